@@ -4,14 +4,22 @@ from django.core.exceptions import PermissionDenied
 
 from .models import (
     AttendanceDay,
+    AttendanceSyncEvent,
     AbsenceJustification,
+    CalendarDay,
     Department,
+    DepartmentRollup,
+    EmployeeRollup,
+    ExportJob,
+    PublicHoliday,
     SystemLog,
     User,
     UserActivity,
     UserDailyLogin,
     UserSession,
+    WeekSnapshot,
 )
+from .rollups import schedule_user_rollup_refresh
 
 
 @admin.register(User)
@@ -43,11 +51,19 @@ class UserAdmin(DjangoUserAdmin):
 
     @admin.action(description="Deactivate selected users")
     def deactivate_users(self, request, queryset):
-        queryset.update(is_active=False)
+        self._set_active(queryset, False)
 
     @admin.action(description="Restore selected users")
     def restore_users(self, request, queryset):
-        queryset.update(is_active=True)
+        self._set_active(queryset, True)
+
+    def _set_active(self, queryset, is_active: bool) -> None:
+        members = list(queryset.values_list("id", "department_id"))
+        queryset.update(is_active=is_active)
+        schedule_user_rollup_refresh(
+            [user_id for user_id, _department_id in members],
+            {department_id for _user_id, department_id in members if department_id},
+        )
 
     def save_model(self, request, obj, form, change):
         if not request.user.is_admin:
@@ -87,6 +103,46 @@ class AttendanceDayAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "user__first_name", "user__last_name")
 
 
+@admin.register(EmployeeRollup)
+class EmployeeRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "user",
+        "period",
+        "period_start",
+        "present_days",
+        "verified_days",
+        "worked_duration",
+    )
+    list_filter = ("period", "period_start")
+    search_fields = ("user__username", "user__first_name", "user__last_name")
+
+
+@admin.register(DepartmentRollup)
+class DepartmentRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "department",
+        "period",
+        "period_start",
+        "present_days",
+        "verified_days",
+        "worked_duration",
+    )
+    list_filter = ("period", "department")
+
+
+@admin.register(PublicHoliday)
+class PublicHolidayAdmin(admin.ModelAdmin):
+    list_display = ("date", "name", "created_at")
+    list_filter = ("date",)
+    search_fields = ("name",)
+
+
+@admin.register(CalendarDay)
+class CalendarDayAdmin(admin.ModelAdmin):
+    list_display = ("date", "is_working_day", "holiday", "working_day_number")
+    list_filter = ("is_working_day", "date")
+
+
 @admin.register(UserSession)
 class UserSessionAdmin(admin.ModelAdmin):
     list_display = (
@@ -117,6 +173,27 @@ class UserDailyLoginAdmin(admin.ModelAdmin):
     search_fields = ("user__username",)
 
 
+@admin.register(WeekSnapshot)
+class WeekSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("week_start", "employee_count", "record_count", "content_hash", "created_at")
+    exclude = ("payload",)
+    readonly_fields = ("week_start", "employee_count", "record_count", "content_hash", "created_at")
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ("filename", "kind", "fmt", "status", "requested_by", "created_at", "finished_at")
+    list_filter = ("status", "kind", "fmt", "created_at")
+    search_fields = ("cache_key", "filename", "requested_by__username")
+
+
+@admin.register(AttendanceSyncEvent)
+class AttendanceSyncEventAdmin(admin.ModelAdmin):
+    list_display = ("user", "action", "date", "client_time", "outcome", "recorded_at", "received_at")
+    list_filter = ("action", "outcome", "date")
+    search_fields = ("user__username", "client_event_id")
+
+
 @admin.register(SystemLog)
 class SystemLogAdmin(admin.ModelAdmin):
     list_display = ("event_type", "user", "ip_address", "created_at")
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import calendar
+from datetime import date, timedelta
+
+from django.db import models
+
+from .models import DepartmentRollup, EmployeeRollup
+from .rollups import DAY, MONTH, month_end, month_start
+from .utils import expected_daily_hours, get_week_start
+from .workcalendar import get_calendar
+
+
+TREND_PALETTE = [
+    "#6F3CFF",
+    "#9C5BFF",
+    "#F05CFF",
+    "#24B47E",
+    "#FF7A59",
+    "#1F8EFA",
+    "#F2C94C",
+    "#5E60CE",
+]
+TREND_WEEK_COUNT = 8
+TREND_MONTH_COUNT = 6
+
+
+def _full_months(start_date: date, end_date: date) -> tuple[date, date] | None:
+    """First and last month start of the calendar months inside the range."""
+    first = start_date if start_date.day == 1 else month_end(start_date) + timedelta(days=1)
+    if end_date == month_end(end_date):
+        last = month_start(end_date)
+    else:
+        last = month_start(month_start(end_date) - timedelta(days=1))
+    return (first, last) if first <= last else None
+
+
+def _rollup_totals(name: str, condition: models.Q) -> dict:
+    return {
+        f"{name}_days": models.Sum("present_days", filter=condition),
+        f"{name}_worked": models.Sum("worked_duration", filter=condition),
+    }
+
+
+def _net(row: dict, added: list[str], removed: list[str]) -> tuple[int, float]:
+    days = sum(row.get(f"{name}_days") or 0 for name in added) - sum(
+        row.get(f"{name}_days") or 0 for name in removed
+    )
+    hours = sum(_hours(row.get(f"{name}_worked")) for name in added) - sum(
+        _hours(row.get(f"{name}_worked")) for name in removed
+    )
+    return days, hours
+
+
+def _hours(duration: timedelta | None) -> float:
+    return duration.total_seconds() / 3600 if duration else 0.0
+
+
+def _period_summary(
+    present_days: int, present_hours: float, expected_days: int, is_intern: bool
+) -> dict:
+    expected_hours = expected_daily_hours(is_intern) * expected_days
+    return {
+        "present_days": present_days,
+        "absent_days": max(expected_days - present_days, 0),
+        "present_hours": present_hours,
+        "absent_hours": max(expected_hours - present_hours, 0),
+        "expected_days": expected_days,
+        "expected_hours": expected_hours,
+    }
+
+
+def summarize_employees(employee_qs, start_date: date, end_date: date, today: date) -> list[dict]:
+    """Range and lifetime attendance totals for every employee in ``employee_qs``.
+
+    Reads the employee rollups: whole months come from month buckets and the
+    partial months at the range edges from day buckets. Day buckets before an
+    employee's start date or after today are subtracted back out. The result
+    takes one query for the employees and one grouped query for the totals.
+    """
+    employees = list(employee_qs)
+    effective_end = min(end_date, today)
+    day = models.Q(period=DAY)
+    month = models.Q(period=MONTH)
+    before_start = models.Q(period_start__lt=models.F("user__start_date"))
+    after_today = models.Q(period_start__gt=today)
+    in_range = models.Q(period_start__range=(start_date, effective_end))
+
+    aggregates = {
+        **_rollup_totals("lifetime", month),
+        **_rollup_totals("lifetime_outside", day & (before_start | after_today)),
+        **_rollup_totals("range_before_start", day & in_range & before_start),
+    }
+    range_added = ["range_edges"]
+    full_months = _full_months(start_date, effective_end)
+    if full_months:
+        first, last = full_months
+        aggregates.update(
+            _rollup_totals("range_months", month & models.Q(period_start__range=(first, last)))
+        )
+        aggregates.update(
+            _rollup_totals(
+                "range_edges",
+                day & in_range & ~models.Q(period_start__range=(first, month_end(last))),
+            )
+        )
+        range_added = ["range_months", "range_edges"]
+    else:
+        aggregates.update(_rollup_totals("range_edges", day & in_range))
+
+    totals = {
+        row["user_id"]: row
+        for row in EmployeeRollup.objects.filter(
+            models.Q(user__in=employee_qs.order_by().values("id")),
+            month | (day & (before_start | after_today | in_range)),
+        )
+        .order_by()
+        .values("user_id")
+        .annotate(**aggregates)
+    }
+
+    work_calendar = get_calendar()
+    summaries = []
+    for employee in employees:
+        row = totals.get(employee.id, {})
+        range_days, range_hours = _net(row, range_added, ["range_before_start"])
+        total_days, total_hours = _net(row, ["lifetime"], ["lifetime_outside"])
+        employee_start = max(start_date, employee.start_date)
+        range_expected = (
+            work_calendar.working_days_between(employee_start, effective_end)
+            if employee_start <= effective_end
+            else 0
+        )
+        total_expected = (
+            work_calendar.working_days_between(employee.start_date, today)
+            if employee.start_date <= today
+            else 0
+        )
+        summaries.append(
+            {
+                "employee": employee,
+                "range": _period_summary(
+                    range_days, range_hours, range_expected, employee.is_intern
+                ),
+                "total": _period_summary(
+                    total_days, total_hours, total_expected, employee.is_intern
+                ),
+            }
+        )
+    return summaries
+
+
+def summarize_departments(departments, summaries: list[dict]) -> list[dict]:
+    by_department = {}
+    for summary in summaries:
+        bucket = by_department.setdefault(
+            summary["employee"].department_id, {"expected": 0, "present": 0}
+        )
+        bucket["expected"] += summary["range"]["expected_days"]
+        bucket["present"] += summary["range"]["present_days"]
+
+    dept_rows = []
+    for dept in departments:
+        bucket = by_department.get(dept.id, {"expected": 0, "present": 0})
+        expected = bucket["expected"]
+        present = bucket["present"]
+        dept_rows.append(
+            {
+                "department": dept,
+                "expected": expected,
+                "present": present,
+                "rate": (present / expected * 100) if expected else 0,
+            }
+        )
+    return dept_rows
+
+
+def add_months(day: date, months: int) -> date:
+    year_offset, month_index = divmod(day.month - 1 + months, 12)
+    return date(day.year + year_offset, month_index + 1, 1)
+
+
+def build_periods(start_date: date, count: int, unit: str) -> list[dict]:
+    periods = []
+    if unit == "week":
+        for offset in range(count):
+            week_start = start_date + timedelta(days=7 * offset)
+            periods.append(
+                {
+                    "start": week_start,
+                    "end": week_start + timedelta(days=6),
+                    "label": week_start.isoformat(),
+                }
+            )
+    elif unit == "month":
+        for offset in range(count):
+            month_start = add_months(start_date, offset)
+            last_day = calendar.monthrange(month_start.year, month_start.month)[1]
+            month_end = date(month_start.year, month_start.month, last_day)
+            periods.append(
+                {
+                    "start": month_start,
+                    "end": month_end,
+                    "label": month_start.strftime("%Y-%m"),
+                }
+            )
+    return periods
+
+
+def _present_by_bucket(departments, periods: list[dict], today: date) -> dict:
+    """Present-day counts keyed by ``(department_id, period_index)``.
+
+    Calendar months that are already over read their month bucket; every
+    other period sums its day buckets up to today.
+    """
+    whens = []
+    scope = None
+    for index, period in enumerate(periods):
+        period_end = min(period["end"], today)
+        if period["start"] > period_end:
+            continue
+        if period["start"].day == 1 and period["end"] == month_end(period["start"]) <= today:
+            condition = models.Q(period=MONTH, period_start=period["start"])
+        else:
+            condition = models.Q(period=DAY, period_start__range=(period["start"], period_end))
+        whens.append(models.When(condition, then=models.Value(index)))
+        scope = scope | condition if scope else condition
+    if not whens:
+        return {}
+
+    rows = (
+        DepartmentRollup.objects.filter(scope, department__in=departments)
+        .annotate(bucket=models.Case(*whens, output_field=models.IntegerField()))
+        .order_by()
+        .values("department_id", "bucket")
+        .annotate(present=models.Sum("present_days"))
+    )
+    return {
+        (row["department_id"], row["bucket"]): row["present"]
+        for row in rows
+        if row["bucket"] is not None
+    }
+
+
+def build_department_trends(departments, employee_qs, periods: list[dict], today: date) -> dict:
+    """Chart.js line datasets of presence rates per department and period."""
+    start_dates_by_department = {}
+    for department_id, start_date in employee_qs.order_by().values_list(
+        "department_id", "start_date"
+    ):
+        start_dates_by_department.setdefault(department_id, []).append(start_date)
+
+    present = _present_by_bucket(departments, periods, today)
+    work_calendar = get_calendar()
+
+    datasets = []
+    for index, dept in enumerate(departments):
+        start_dates = start_dates_by_department.get(dept.id, [])
+        series = []
+        for period_index, period in enumerate(periods):
+            period_end = min(period["end"], today)
+            expected = 0
+            for start_date in start_dates:
+                employee_start = max(period["start"], start_date)
+                if employee_start <= period_end:
+                    expected += work_calendar.working_days_between(employee_start, period_end)
+            count = present.get((dept.id, period_index), 0)
+            rate = (count / expected * 100) if expected else 0
+            series.append(round(rate, 1))
+
+        color = TREND_PALETTE[index % len(TREND_PALETTE)]
+        datasets.append(
+            {
+                "label": dept.name,
+                "data": series,
+                "borderColor": color,
+                "backgroundColor": color,
+                "tension": 0.35,
+            }
+        )
+
+    return {"labels": [period["label"] for period in periods], "datasets": datasets}
+
+
+def department_trend_charts(departments, employee_qs, today: date) -> tuple[dict, dict]:
+    departments = list(departments)
+    weekly_start = get_week_start(today) - timedelta(days=7 * (TREND_WEEK_COUNT - 1))
+    monthly_start = add_months(date(today.year, today.month, 1), -(TREND_MONTH_COUNT - 1))
+    weekly_chart = build_department_trends(
+        departments,
+        employee_qs,
+        build_periods(weekly_start, TREND_WEEK_COUNT, "week"),
+        today,
+    )
+    monthly_chart = build_department_trends(
+        departments,
+        employee_qs,
+        build_periods(monthly_start, TREND_MONTH_COUNT, "month"),
+        today,
+    )
+    return weekly_chart, monthly_chart
@@ -6,4 +6,9 @@ class AttendanceConfig(AppConfig):
     name = "attendance"
 
     def ready(self) -> None:
+        from django.core.signals import request_finished
+
         from . import signals  # noqa: F401
+        from .audit import flush_audit_log_if_due
+
+        request_finished.connect(flush_audit_log_if_due, dispatch_uid="audit-log-flush")
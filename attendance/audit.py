@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import transaction
+
+from .dbretry import retry_write
+from .flushing import BackgroundFlusher
+from .models import SystemLog, UserActivity
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+BUFFERED = "buffered"
+
+
+class AuditBuffer(BackgroundFlusher):
+    """Per-process write-behind queue for ``SystemLog`` and ``UserActivity`` rows.
+
+    Rows are stamped when they are recorded and written with one
+    ``bulk_create`` per model by a background thread, once
+    ``AUDIT_LOG_BATCH_SIZE`` rows are queued, when the oldest row is
+    ``AUDIT_LOG_FLUSH_SECONDS`` old, and at interpreter shutdown. Rows still
+    queued when the process dies are lost; use the ``sync`` mode when that
+    matters more than request latency. A batch that fails ``max_batch_failures``
+    times in a row is written row by row, and the rows that still fail are
+    dropped and counted.
+    """
+
+    thread_name = "audit-log-flusher"
+    max_batch_failures = 3
+
+    def __init__(self):
+        super().__init__()
+        self._rows = deque()
+        self.flushed = 0
+        self.flushes = 0
+        self.failures = 0
+        self.batch_failures = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def add(self, row) -> None:
+        with self._lock:
+            self._rows.append((time.monotonic(), row))
+            self._trim()
+            depth = len(self._rows)
+        self.ensure_thread()
+        # The first row starts the flush timer; a full batch is flushed right away.
+        if depth == 1 or depth >= settings.AUDIT_LOG_BATCH_SIZE:
+            self.wake()
+
+    def _trim(self) -> None:
+        # Called with the lock held: drop the oldest rows beyond the cap.
+        while len(self._rows) > settings.AUDIT_LOG_MAX_QUEUE:
+            self._rows.popleft()
+            self.dropped += 1
+
+    def next_due_in(self) -> float | None:
+        with self._lock:
+            if not self._rows:
+                return None
+            if len(self._rows) >= settings.AUDIT_LOG_BATCH_SIZE:
+                return 0.0
+            age = time.monotonic() - self._rows[0][0]
+        return settings.AUDIT_LOG_FLUSH_SECONDS - age
+
+    def flush(self) -> int:
+        with self._lock:
+            batch = list(self._rows)
+            self._rows.clear()
+        if not batch:
+            return 0
+        rows = [row for _queued_at, row in batch]
+        started = time.perf_counter()
+        if self.batch_failures >= self.max_batch_failures:
+            rows = self._write_each(rows)
+        else:
+            try:
+                _write_rows(rows)
+            except Exception:
+                logger.exception("Audit log flush of %s rows failed", len(rows))
+                with self._lock:
+                    self.failures += 1
+                    self.batch_failures += 1
+                    # Retry with the next flush, ahead of anything queued meanwhile.
+                    self._rows.extendleft(reversed(batch))
+                    self._trim()
+                return 0
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.batch_failures = 0
+            self.flushed += len(rows)
+            self.flushes += 1
+            self.last_flush_ms = elapsed
+            self.max_flush_ms = max(self.max_flush_ms, elapsed)
+            self.total_flush_ms += elapsed
+        return len(rows)
+
+    def _write_each(self, rows: list) -> list:
+        """Write rows one at a time after repeated batch failures; returns the written ones."""
+        written = []
+        for row in rows:
+            try:
+                _write_rows([row])
+            except Exception:
+                logger.warning("Audit log row %r could not be written", row, exc_info=True)
+                continue
+            written.append(row)
+        rejected = len(rows) - len(written)
+        if rejected:
+            logger.error("Dropped %s of %s audit log rows after repeated failures", rejected, len(rows))
+            with self._lock:
+                self.rejected += rejected
+        return written
+
+    def metrics(self) -> dict:
+        with self._lock:
+            oldest = time.monotonic() - self._rows[0][0] if self._rows else 0.0
+            return {
+                "mode": settings.AUDIT_LOG_MODE,
+                "queue_depth": len(self._rows),
+                "oldest_age_seconds": round(oldest, 3),
+                "flushed_rows": self.flushed,
+                "flushes": self.flushes,
+                "failed_flushes": self.failures,
+                "dropped_rows": self.dropped,
+                "rejected_rows": self.rejected,
+                "last_flush_ms": round(self.last_flush_ms, 2),
+                "max_flush_ms": round(self.max_flush_ms, 2),
+                "avg_flush_ms": round(self.total_flush_ms / self.flushes, 2) if self.flushes else 0.0,
+            }
+
+
+@retry_write
+def _write_rows(rows: list) -> None:
+    for model in (SystemLog, UserActivity):
+        model_rows = [row for row in rows if isinstance(row, model)]
+        if model_rows:
+            model.objects.bulk_create(model_rows)
+
+
+_buffer = AuditBuffer()
+atexit.register(_buffer.flush)
+
+
+def _record(row) -> None:
+    if settings.AUDIT_LOG_MODE == BUFFERED:
+        # Queued once the surrounding transaction commits (immediately outside
+        # one), so rolled back or retried writes never leave a log row behind.
+        transaction.on_commit(lambda: _buffer.add(row))
+    else:
+        row.save(force_insert=True)
+
+
+def log_event(
+    event_type: str, message: str, user=None, ip_address: str = "", meta: dict | None = None
+) -> None:
+    _record(
+        SystemLog(
+            event_type=event_type,
+            message=message,
+            user=user,
+            ip_address=ip_address,
+            meta=meta or {},
+        )
+    )
+
+
+def log_activity(
+    user, actor, event_type: str, message: str, meta: dict | None = None
+) -> None:
+    _record(
+        UserActivity(
+            user=user,
+            actor=actor,
+            event_type=event_type,
+            message=message,
+            meta=meta or {},
+        )
+    )
+
+
+def flush_audit_log() -> int:
+    """Write everything queued so far; returns the number of rows written."""
+    return _buffer.flush()
+
+
+def flush_audit_log_if_due(**kwargs) -> None:
+    """``request_finished`` hook: wake the flusher when a threshold is reached."""
+    _buffer.wake_if_due()
+
+
+def audit_metrics() -> dict:
+    return _buffer.metrics()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import functools
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+
+def is_lock_error(exc: Exception) -> bool:
+    return "database is locked" in str(exc) or "database table is locked" in str(exc)
+
+
+def retry_write(func):
+    """Run ``func`` in its own transaction, retrying it while SQLite is locked.
+
+    Waits ``DATABASE_RETRY_BACKOFF * 2 ** attempt`` seconds (with jitter)
+    between at most ``DATABASE_WRITE_RETRIES`` retries. A call nested in an
+    outer transaction is never retried, and neither is a failure raised by an
+    on-commit hook once the transaction has committed.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        retries = settings.DATABASE_WRITE_RETRIES
+        for attempt in range(retries + 1):
+            committed = []
+            try:
+                with transaction.atomic():
+                    # Registered first, so it runs before the hooks ``func`` adds.
+                    transaction.on_commit(lambda: committed.append(True))
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if (
+                    committed
+                    or attempt == retries
+                    or connection.in_atomic_block
+                    or not is_lock_error(exc)
+                ):
+                    raise
+            time.sleep(settings.DATABASE_RETRY_BACKOFF * 2**attempt * random.uniform(0.5, 1.5))
+
+    return wrapper
@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import tempfile
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import models
+from django.http import FileResponse
+from django.urls import reverse
+from django.utils import timezone, translation
+from django.utils.translation import get_language, gettext as _
+
+from .exports import (
+    XLSX_CONTENT_TYPE,
+    export_fingerprint,
+    iter_range_csv,
+    iter_week_csv,
+    track_rss,
+    write_range_xlsx,
+    write_week_xlsx,
+)
+from .models import ExportJob
+
+# How often the "export is being prepared" page reloads itself.
+EXPORT_PENDING_REFRESH_SECONDS = 3
+# A job no worker has picked up after this long is reported as stalled.
+EXPORT_PENDING_TIMEOUT = timedelta(minutes=2)
+# A failed job is shown instead of being queued again for this long.
+EXPORT_FAILED_REUSE = timedelta(hours=1)
+
+
+def job_params(start_date: date, end_date: date, department_id=None, search=None) -> dict:
+    return {
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "department": int(department_id) if department_id else None,
+        "search": search or "",
+        "language": get_language() or settings.LANGUAGE_CODE,
+    }
+
+
+def week_export_params(week_start: date, department_id=None, search=None) -> dict:
+    return job_params(week_start, week_start + timedelta(days=6), department_id, search)
+
+
+def _dates(params: dict) -> tuple[date, date]:
+    return date.fromisoformat(params["start"]), date.fromisoformat(params["end"])
+
+
+def export_cache_key(kind: str, fmt: str, params: dict) -> str:
+    key = f"{kind}:{fmt}:{params['start']}:{params['end']}"
+    if params.get("department"):
+        key += f":department={params['department']}"
+    if params.get("search"):
+        key += f":search={params['search']}"
+    if params.get("language"):
+        key += f":language={params['language']}"
+    return key[:255]
+
+
+def export_filename(kind: str, fmt: str, params: dict) -> str:
+    if kind == ExportJob.Kinds.WEEK:
+        return f"attendance_{params['start']}.{fmt}"
+    return f"attendance_{params['start']}_{params['end']}.{fmt}"
+
+
+def _fingerprint(params: dict) -> str:
+    start_date, end_date = _dates(params)
+    return export_fingerprint(
+        start_date,
+        end_date,
+        department_id=params.get("department"),
+        search=params.get("search"),
+    )
+
+
+def cached_export(kind: str, fmt: str, params: dict, fingerprint: str | None = None):
+    """The finished job whose artifact matches the current data, if any."""
+    fingerprint = fingerprint or _fingerprint(params)
+    job = (
+        ExportJob.objects.filter(
+            cache_key=export_cache_key(kind, fmt, params),
+            fingerprint=fingerprint,
+            status=ExportJob.Status.DONE,
+        )
+        .exclude(artifact="")
+        .order_by("-finished_at")
+        .first()
+    )
+    if job and job.artifact.storage.exists(job.artifact.name):
+        return job
+    return None
+
+
+def request_export(
+    kind: str,
+    fmt: str,
+    params: dict,
+    user=None,
+    fingerprint: str | None = None,
+    retry: bool = False,
+) -> ExportJob:
+    """Return a job for the export, reusing a cached, queued or failed one when possible.
+
+    A recent failed job for the same data is returned as is, so its error can
+    be shown; only ``retry`` queues the export again.
+    """
+    fingerprint = fingerprint or _fingerprint(params)
+    job = cached_export(kind, fmt, params, fingerprint)
+    if job:
+        return job
+    cache_key = export_cache_key(kind, fmt, params)
+    jobs = ExportJob.objects.filter(cache_key=cache_key, fingerprint=fingerprint)
+    job = jobs.filter(status__in=[ExportJob.Status.PENDING, ExportJob.Status.RUNNING]).first()
+    if job:
+        return job
+    if not retry:
+        job = (
+            jobs.filter(
+                status=ExportJob.Status.FAILED,
+                created_at__gte=timezone.now() - EXPORT_FAILED_REUSE,
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        if job:
+            return job
+    return ExportJob.objects.create(
+        kind=kind,
+        fmt=fmt,
+        params=params,
+        cache_key=cache_key,
+        fingerprint=fingerprint,
+        requested_by=user,
+        filename=export_filename(kind, fmt, params),
+    )
+
+
+def claim_job(job: ExportJob) -> bool:
+    """Atomically move a pending job to running; False if someone else got it."""
+    now = timezone.now()
+    claimed = ExportJob.objects.filter(id=job.id, status=ExportJob.Status.PENDING).update(
+        status=ExportJob.Status.RUNNING, started_at=now
+    )
+    if claimed:
+        job.status = ExportJob.Status.RUNNING
+        job.started_at = now
+    return bool(claimed)
+
+
+def claim_next_job() -> ExportJob | None:
+    """Claim the oldest pending job; safe with several workers."""
+    while True:
+        job = (
+            ExportJob.objects.filter(status=ExportJob.Status.PENDING)
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+        if claim_job(job):
+            return job
+
+
+def _write_artifact(job: ExportJob, fileobj) -> int:
+    start_date, end_date = _dates(job.params)
+    filters = {
+        "department_id": job.params.get("department"),
+        "search": job.params.get("search"),
+    }
+    if job.fmt == ExportJob.Formats.XLSX:
+        if job.kind == ExportJob.Kinds.WEEK:
+            return write_week_xlsx(fileobj, start_date, **filters)
+        return write_range_xlsx(fileobj, start_date, end_date, **filters)
+
+    if job.kind == ExportJob.Kinds.WEEK:
+        lines = iter_week_csv(start_date, **filters)
+    else:
+        lines = iter_range_csv(start_date, end_date, **filters)
+    rows = -1
+    for line in lines:
+        fileobj.write(line.encode("utf-8"))
+        rows += 1
+    return rows
+
+
+def run_job(job: ExportJob) -> ExportJob:
+    """Generate the artifact of a claimed job and drop superseded ones."""
+    language = job.params.get("language") or settings.LANGUAGE_CODE
+    try:
+        with translation.override(language), tempfile.TemporaryFile() as spool:
+            with track_rss() as stats:
+                stats["rows"] = _write_artifact(job, spool)
+            spool.seek(0)
+            job.artifact.save(job.filename, File(spool), save=False)
+    except Exception as exc:
+        job.status = ExportJob.Status.FAILED
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        return job
+
+    job.status = ExportJob.Status.DONE
+    job.meta = stats
+    job.finished_at = timezone.now()
+    job.save(update_fields=["artifact", "status", "meta", "finished_at"])
+    discard_artifacts(
+        ExportJob.objects.filter(cache_key=job.cache_key, status=ExportJob.Status.DONE)
+        .exclude(fingerprint=job.fingerprint)
+    )
+    return job
+
+
+def discard_artifacts(jobs) -> int:
+    removed = 0
+    for job in jobs.exclude(artifact=""):
+        job.artifact.delete(save=False)
+        job.save(update_fields=["artifact"])
+        removed += 1
+    return removed
+
+
+def reset_stale_jobs(older_than: timedelta) -> int:
+    """Requeue running jobs whose worker died before finishing them."""
+    cutoff = timezone.now() - older_than
+    return ExportJob.objects.filter(
+        status=ExportJob.Status.RUNNING, started_at__lt=cutoff
+    ).update(status=ExportJob.Status.PENDING, started_at=None)
+
+
+def prune_jobs(older_than: timedelta) -> int:
+    """Delete finished jobs and their files once they are older than ``older_than``."""
+    cutoff = timezone.now() - older_than
+    old_jobs = ExportJob.objects.filter(
+        models.Q(status__in=[ExportJob.Status.DONE, ExportJob.Status.FAILED]),
+        created_at__lt=cutoff,
+    )
+    discard_artifacts(old_jobs)
+    deleted, _details = old_jobs.delete()
+    return deleted
+
+
+def artifact_response(job: ExportJob) -> FileResponse:
+    content_type = XLSX_CONTENT_TYPE if job.fmt == ExportJob.Formats.XLSX else "text/csv"
+    return FileResponse(
+        job.artifact.open("rb"),
+        as_attachment=True,
+        filename=job.filename,
+        content_type=content_type,
+    )
+
+
+def job_stalled(job: ExportJob) -> bool:
+    """Still queued long after it was requested: probably no worker is running."""
+    return (
+        job.status == ExportJob.Status.PENDING
+        and job.created_at < timezone.now() - EXPORT_PENDING_TIMEOUT
+    )
+
+
+def job_status(job: ExportJob) -> dict:
+    stalled = job_stalled(job)
+    return {
+        "id": job.id,
+        "status": job.status,
+        "status_label": job.get_status_display(),
+        "filename": job.filename,
+        "error": job.error,
+        "stalled": stalled,
+        "note": _("No export worker has picked this file up yet.") if stalled else "",
+        "download_url": (
+            reverse("export_job_download", args=[job.id])
+            if job.status == ExportJob.Status.DONE
+            else None
+        ),
+        "status_url": reverse("export_job_status", args=[job.id]),
+    }
@@ -0,0 +1,431 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import os
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Iterator
+
+from django.db import models
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext as _
+from openpyxl import Workbook
+
+from .models import AttendanceDay, Department, User
+from .utils import get_week_days, get_week_start
+
+
+EXPORT_CHUNK_SIZE = 500
+EXPORT_RANGE_CHUNK_WEEKS = 4
+WEEKDAY_LABELS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+RECORD_FIELDS = (
+    "arrival_time",
+    "departure_time",
+    "verified_by_id",
+    "verified_by__first_name",
+    "verified_by__last_name",
+    "verified_at",
+)
+EMPLOYEE_FIELDS = (
+    "id",
+    "username",
+    "first_name",
+    "last_name",
+    "department_id",
+    "department__name",
+    "unassigned",
+)
+
+
+class Echo:
+    """File-like object whose ``write`` hands the CSV line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def day_columns(labels: list[str]) -> list[str]:
+    header = []
+    for label in labels:
+        header.extend(
+            [
+                f"{label} Arrival",
+                f"{label} Departure",
+                f"{label} Verified By",
+                f"{label} Verified At",
+            ]
+        )
+    return header
+
+
+def export_header(week_days: list[date], with_department: bool = True) -> list[str]:
+    prefix = ["Department", "Employee"] if with_department else ["Employee"]
+    return prefix + day_columns([day.isoformat() for day in week_days])
+
+
+def range_header(with_department: bool = True) -> list[str]:
+    prefix = ["Week", "Department", "Employee"] if with_department else ["Week", "Employee"]
+    return prefix + day_columns(WEEKDAY_LABELS)
+
+
+def _full_name(first_name: str, last_name: str) -> str:
+    return f"{first_name} {last_name}".strip()
+
+
+def _cell_values(record) -> list[str]:
+    if record is None:
+        return ["", "", "", ""]
+    arrival, departure, _verifier_id, verifier_first, verifier_last, verified_at = record
+    return [
+        arrival.strftime("%H:%M") if arrival else "",
+        departure.strftime("%H:%M") if departure else "",
+        _full_name(verifier_first or "", verifier_last or ""),
+        verified_at.strftime("%Y-%m-%d %H:%M") if verified_at else "",
+    ]
+
+
+def export_employees(department_id=None, search=None, include_inactive=True):
+    """Employees in export order: departments by name, unassigned last."""
+    employee_qs = User.objects.filter(role=User.Roles.EMPLOYEE)
+    unassigned = models.Q(department__isnull=True)
+    if not include_inactive:
+        employee_qs = employee_qs.filter(is_active=True)
+        unassigned |= models.Q(department__is_active=False)
+    if department_id:
+        employee_qs = employee_qs.filter(department_id=department_id)
+    if search:
+        employee_qs = employee_qs.filter(
+            models.Q(first_name__icontains=search)
+            | models.Q(last_name__icontains=search)
+            | models.Q(username__icontains=search)
+        )
+    return employee_qs.annotate(
+        unassigned=models.Case(
+            models.When(unassigned, then=models.Value(1)),
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
+    ).order_by("unassigned", "department__name", "department_id", "last_name", "first_name")
+
+
+def export_version(
+    start_date: date,
+    end_date: date,
+    department_id=None,
+    search=None,
+    include_inactive: bool = True,
+) -> tuple[str, datetime | None]:
+    """Data version of an export and the time its attendance last changed.
+
+    The version hashes the exported employees and departments plus cheap
+    aggregates of the attendance rows in the range, without reading those
+    rows, so it changes whenever the export content could change.
+    """
+    employee_qs = export_employees(department_id, search, include_inactive)
+    attendance = (
+        AttendanceDay.objects.filter(
+            user__in=employee_qs.order_by().values("id"),
+            date__range=(start_date, end_date),
+        )
+        .order_by()
+        .aggregate(
+            rows=models.Count("id"),
+            id_sum=models.Sum("id"),
+            updated=models.Max("updated_at"),
+            verified=models.Count("verified_by"),
+            verified_at=models.Max("verified_at"),
+        )
+    )
+    employees = employee_qs.values_list(
+        "id", "username", "first_name", "last_name", "department_id", "unassigned"
+    )
+    departments = export_departments(department_id, include_inactive).values_list("id", "name")
+    digest = hashlib.sha256()
+    for part in (sorted(attendance.items()), list(employees), list(departments)):
+        digest.update(repr(part).encode())
+    changes = [value for value in (attendance["updated"], attendance["verified_at"]) if value]
+    return digest.hexdigest(), max(changes) if changes else None
+
+
+def export_fingerprint(*args, **kwargs) -> str:
+    return export_version(*args, **kwargs)[0]
+
+
+def _chunks(iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def week_records(user_ids, week_start: date) -> dict:
+    """Attendance of ``user_ids`` for the week keyed by ``(user_id, date)``."""
+    return {
+        (user_id, day): tuple(rest)
+        for user_id, day, *rest in AttendanceDay.objects.filter(
+            user_id__in=user_ids,
+            date__range=(week_start, week_start + timedelta(days=6)),
+        )
+        .order_by()
+        .values_list("user_id", "date", *RECORD_FIELDS)
+    }
+
+
+def iter_week_chunks(
+    week_start: date,
+    department_id=None,
+    search=None,
+    include_inactive: bool = True,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    use_snapshot: bool = True,
+) -> Iterator[tuple[list[tuple], dict]]:
+    """Yield ``(employee tuples, attendance by (user_id, date))`` in export order.
+
+    Closed weeks come from their snapshot in a single chunk; other weeks read
+    employees in chunks of ``chunk_size`` with one attendance query each, so
+    memory stays bounded by the chunk size.
+    """
+    if use_snapshot and include_inactive:
+        from .snapshots import frozen_week
+
+        frozen = frozen_week(week_start, department_id, search)
+        if frozen is not None:
+            if frozen[0]:
+                yield frozen
+            return
+
+    employees = export_employees(department_id, search, include_inactive).values_list(
+        *EMPLOYEE_FIELDS
+    )
+    for chunk in _chunks(employees.iterator(chunk_size=chunk_size), chunk_size):
+        yield chunk, week_records([row[0] for row in chunk], week_start)
+
+
+def iter_week_rows(
+    week_start: date,
+    department_id=None,
+    search=None,
+    include_inactive: bool = True,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[tuple[int | None, str, list[str]]]:
+    """Yield ``(department id, department label, [employee, *day cells])``.
+
+    The department id is ``None`` for employees exported as unassigned.
+    """
+    week_days = get_week_days(week_start)
+    unassigned_label = _("Unassigned")
+    for chunk, records in iter_week_chunks(
+        week_start, department_id, search, include_inactive, chunk_size
+    ):
+        for user_id, username, first_name, last_name, dept_id, dept_name, unassigned in chunk:
+            values = [_full_name(first_name, last_name) or username]
+            for day in week_days:
+                values.extend(_cell_values(records.get((user_id, day))))
+            if unassigned:
+                yield None, unassigned_label, values
+            else:
+                yield dept_id, dept_name, values
+
+
+def range_weeks(start_date: date, end_date: date) -> list[date]:
+    weeks = []
+    week_start = get_week_start(start_date)
+    while week_start <= end_date:
+        weeks.append(week_start)
+        week_start += timedelta(days=7)
+    return weeks
+
+
+def iter_range_rows(
+    start_date: date,
+    end_date: date,
+    department_id=None,
+    search=None,
+    include_inactive: bool = True,
+    chunk_weeks: int = EXPORT_RANGE_CHUNK_WEEKS,
+) -> Iterator[tuple[date, int | None, str, list[str]]]:
+    """Yield ``(week start, department id, label, [employee, *day cells])``.
+
+    The employee list is read once; attendance is read in date order,
+    ``chunk_weeks`` weeks per query, so the cost grows linearly with the
+    number of weeks and memory is bounded by one chunk.
+    """
+    employee_qs = export_employees(department_id, search, include_inactive)
+    employees = list(employee_qs.values_list(*EMPLOYEE_FIELDS))
+    if not employees:
+        return
+    unassigned_label = _("Unassigned")
+    weeks = range_weeks(start_date, end_date)
+    for chunk in _chunks(weeks, chunk_weeks):
+        records = {
+            (user_id, day): tuple(rest)
+            for user_id, day, *rest in AttendanceDay.objects.filter(
+                user__in=employee_qs.order_by().values("id"),
+                date__range=(chunk[0], chunk[-1] + timedelta(days=6)),
+            )
+            .order_by("date")
+            .values_list("user_id", "date", *RECORD_FIELDS)
+        }
+        for week_start in chunk:
+            week_days = get_week_days(week_start)
+            for user_id, username, first_name, last_name, dept_id, dept_name, unassigned in employees:
+                values = [_full_name(first_name, last_name) or username]
+                for day in week_days:
+                    values.extend(_cell_values(records.get((user_id, day))))
+                if unassigned:
+                    yield week_start, None, unassigned_label, values
+                else:
+                    yield week_start, dept_id, dept_name, values
+
+
+def iter_range_csv(start_date: date, end_date: date, **filters) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(range_header())
+    for week_start, _department_id, department_label, values in iter_range_rows(
+        start_date, end_date, **filters
+    ):
+        yield writer.writerow([week_start.isoformat(), department_label, *values])
+
+
+def iter_week_csv(week_start: date, **filters) -> Iterator[str]:
+    writer = csv.writer(Echo())
+    yield writer.writerow(export_header(get_week_days(week_start)))
+    for _department_id, department_label, values in iter_week_rows(week_start, **filters):
+        yield writer.writerow([department_label, *values])
+
+
+def streaming_csv_response(lines: Iterator[str], filename: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        (line.encode("utf-8") for line in lines), content_type="text/csv"
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_departments(department_id=None, include_inactive: bool = True):
+    departments = Department.objects.order_by("name", "id")
+    if not include_inactive:
+        departments = departments.filter(is_active=True)
+    if department_id:
+        departments = departments.filter(id=department_id)
+    return departments
+
+
+def write_week_xlsx(
+    fileobj,
+    week_start: date,
+    department_id=None,
+    search=None,
+    include_inactive: bool = True,
+) -> int:
+    """Write one sheet per department with a write-only workbook.
+
+    Rows arrive grouped by department, so each sheet is filled in turn and
+    openpyxl flushes cells to disk as they are appended. Returns the number
+    of employee rows written.
+    """
+    workbook = Workbook(write_only=True)
+    header = export_header(get_week_days(week_start), with_department=False)
+    rows = iter_week_rows(
+        week_start,
+        department_id=department_id,
+        search=search,
+        include_inactive=include_inactive,
+    )
+    pending = next(rows, None)
+    written = 0
+
+    for department in export_departments(department_id, include_inactive):
+        sheet = workbook.create_sheet(title=department.name[:31])
+        sheet.append(header)
+        while pending is not None and pending[0] == department.id:
+            sheet.append(pending[2])
+            written += 1
+            pending = next(rows, None)
+
+    if pending is not None:
+        sheet = workbook.create_sheet(title=pending[1][:31])
+        sheet.append(header)
+        while pending is not None:
+            sheet.append(pending[2])
+            written += 1
+            pending = next(rows, None)
+
+    workbook.save(fileobj)
+    return written
+
+
+def write_range_xlsx(
+    fileobj,
+    start_date: date,
+    end_date: date,
+    department_id=None,
+    search=None,
+    include_inactive: bool = True,
+) -> int:
+    """Write a range export, one sheet per department, weeks in date order.
+
+    Rows of a week are spread over the department sheets as they arrive;
+    write-only sheets each stream to their own temporary file.
+    """
+    workbook = Workbook(write_only=True)
+    header = range_header(with_department=False)
+    sheets = {}
+    for department in export_departments(department_id, include_inactive):
+        sheet = workbook.create_sheet(title=department.name[:31])
+        sheet.append(header)
+        sheets[department.id] = sheet
+
+    written = 0
+    for week_start, dept_id, department_label, values in iter_range_rows(
+        start_date,
+        end_date,
+        department_id=department_id,
+        search=search,
+        include_inactive=include_inactive,
+    ):
+        sheet = sheets.get(dept_id)
+        if sheet is None:
+            sheet = workbook.create_sheet(title=department_label[:31])
+            sheet.append(header)
+            sheets[dept_id] = sheet
+        sheet.append([week_start.isoformat(), *values])
+        written += 1
+
+    workbook.save(fileobj)
+    return written
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _current_rss_kb() -> int | None:
+    """Resident set size of the process right now, from ``/proc`` (Linux only)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return resident_pages * _PAGE_SIZE // 1024
+
+
+@contextmanager
+def track_rss():
+    """Record the process's current resident memory before and after the block.
+
+    ``rss_before_kb``/``rss_after_kb`` are point samples of the whole process,
+    not a peak: they show how much memory an export left behind, each export
+    measured on its own even in a long-lived worker. Both are ``None`` where
+    ``/proc`` is unavailable.
+    """
+    stats = {"rss_before_kb": _current_rss_kb(), "rss_after_kb": None}
+    try:
+        yield stats
+    finally:
+        stats["rss_after_kb"] = _current_rss_kb()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from django.db import connection
+
+
+class BackgroundFlusher:
+    """Per-process buffer written to the database by a lazily started daemon thread.
+
+    Subclasses implement ``flush`` (returning how much it wrote, ``0`` when it
+    failed and kept the buffer) and ``next_due_in`` (seconds until the buffer
+    should be flushed, or ``None`` when it is empty), call ``ensure_thread``
+    whenever they buffer something and ``wake`` when the flush timer should
+    be recomputed.
+    """
+
+    thread_name = "flusher"
+    idle_seconds = 60.0
+    retry_seconds = 5.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def flush(self) -> int:
+        raise NotImplementedError
+
+    def next_due_in(self) -> float | None:
+        raise NotImplementedError
+
+    def due(self) -> bool:
+        due_in = self.next_due_in()
+        return due_in is not None and due_in <= 0
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def wake_if_due(self) -> None:
+        if self.due():
+            self._wake.set()
+
+    def ensure_thread(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            due_in = self.next_due_in()
+            self._wake.wait(self.idle_seconds if due_in is None else max(due_in, 0.01))
+            self._wake.clear()
+            if self.due():
+                flushed = self.flush()
+                connection.close()
+                if not flushed and self.due():
+                    # The flush failed and kept its rows; back off before retrying.
+                    time.sleep(self.retry_seconds)
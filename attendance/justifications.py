@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from datetime import date
+
+from django.db import models
+
+from .models import AbsenceJustification, User
+
+
+JUSTIFICATION_PAGE_SIZE = 25
+
+
+def filter_justifications(status=None, search=None, start_date=None, end_date=None):
+    justifications = AbsenceJustification.objects.all()
+    if status:
+        justifications = justifications.filter(status=status)
+    if search:
+        matching_users = User.objects.filter(
+            models.Q(first_name__icontains=search)
+            | models.Q(last_name__icontains=search)
+            | models.Q(username__icontains=search)
+        ).values("id")
+        justifications = justifications.filter(
+            models.Q(user_id__in=matching_users) | models.Q(other_reason__icontains=search)
+        )
+    # Overlap with the requested period.
+    if start_date:
+        justifications = justifications.filter(end_date__gte=start_date)
+    if end_date:
+        justifications = justifications.filter(start_date__lte=end_date)
+    return justifications
+
+
+def encode_cursor(justification: AbsenceJustification) -> str:
+    return f"{justification.start_date.isoformat()}.{justification.id}"
+
+
+def decode_cursor(value: str | None) -> tuple[date, int] | None:
+    try:
+        day, justification_id = (value or "").split(".")
+        return date.fromisoformat(day), int(justification_id)
+    except ValueError:
+        return None
+
+
+def justification_page(queryset, after=None, before=None, size: int = JUSTIFICATION_PAGE_SIZE):
+    """One page of ``queryset`` newest first, keyed on ``(start_date, id)``.
+
+    ``after`` and ``before`` are cursors from a previous page; each page is a
+    single indexed range query that reads at most ``size + 1`` rows.
+    Returns ``(rows, previous cursor, next cursor)``.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if not after else None
+    if before:
+        day, justification_id = before
+        rows = list(
+            queryset.filter(
+                models.Q(start_date__gt=day) | models.Q(id__gt=justification_id),
+                start_date__gte=day,
+            ).order_by("start_date", "id")[: size + 1]
+        )
+        has_previous = len(rows) > size
+        rows = rows[:size][::-1]
+        has_next = True
+    else:
+        if after:
+            day, justification_id = after
+            queryset = queryset.filter(
+                models.Q(start_date__lt=day) | models.Q(id__lt=justification_id),
+                start_date__lte=day,
+            )
+        rows = list(queryset.order_by("-start_date", "-id")[: size + 1])
+        has_next = len(rows) > size
+        rows = rows[:size]
+        has_previous = after is not None
+
+    previous_cursor = encode_cursor(rows[0]) if rows and has_previous else None
+    next_cursor = encode_cursor(rows[-1]) if rows and has_next else None
+    return rows, previous_cursor, next_cursor
+
+
+def pending_justification_count() -> int:
+    """Pending count answered from the status index alone."""
+    return AbsenceJustification.objects.filter(
+        status=AbsenceJustification.Status.PENDING
+    ).count()
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.core import signing
+
+from .models import User
+
+
+KIOSK_TOKEN_SALT = "attendance.kiosk"
+
+
+def _signer() -> signing.TimestampSigner:
+    return signing.TimestampSigner(salt=KIOSK_TOKEN_SALT)
+
+
+def issue_kiosk_token(user: User) -> str:
+    """Badge token for ``user``, valid for ``KIOSK_TOKEN_MAX_AGE`` seconds."""
+    return _signer().sign(str(user.pk))
+
+
+def read_kiosk_token(token: str) -> int | None:
+    """User id of a valid, unexpired token; checked from the signature alone.
+
+    Rotating ``SECRET_KEY`` (with the old key in ``SECRET_KEY_FALLBACKS``)
+    retires every token at once.
+    """
+    if not isinstance(token, str):
+        return None
+    try:
+        value = _signer().unsign(token, max_age=settings.KIOSK_TOKEN_MAX_AGE)
+        return int(value)
+    except (signing.BadSignature, ValueError):
+        return None
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from heapq import merge
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .dbretry import retry_write
+from .models import SystemLog, UserActivity
+from .timeline import encode_cursor, keyset_filter
+
+ARCHIVED_MODELS = {"system": SystemLog, "activity": UserActivity}
+# Widest range (in days) read from the archive in one request.
+ARCHIVE_MAX_RANGE_DAYS = 366
+# Rows per page of the admin log query.
+ARCHIVE_PAGE_SIZE = 1000
+
+
+def _fields(model) -> list[str]:
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def archive_path(model, day: date) -> Path:
+    """``<LOG_ARCHIVE_ROOT>/<model>/<YYYY>/<YYYY-MM-DD>.jsonl.gz``, one file per local day."""
+    return (
+        Path(settings.LOG_ARCHIVE_ROOT)
+        / model._meta.model_name
+        / f"{day.year:04d}"
+        / f"{day.isoformat()}.jsonl.gz"
+    )
+
+
+def _append(path: Path, rows: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Each append is its own gzip member; readers see one continuous stream.
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb") as handle:
+            for row in rows:
+                handle.write(json.dumps(row, cls=DjangoJSONEncoder).encode() + b"\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+@retry_write
+def _delete_ids(model, ids: list[int]) -> int:
+    deleted, _per_model = model.objects.filter(id__in=ids).delete()
+    return deleted
+
+
+def archive_batch(model, cutoff: datetime, batch_size: int) -> int:
+    """Move up to ``batch_size`` rows created before ``cutoff`` to the archive.
+
+    Rows are written and synced to disk before they are deleted, so a crash
+    in between leaves them in both places; readers drop the duplicates by id.
+    """
+    rows = list(
+        model.objects.filter(created_at__lt=cutoff)
+        .order_by("id")
+        .values(*_fields(model))[:batch_size]
+    )
+    if not rows:
+        return 0
+    by_day: dict[date, list[dict]] = {}
+    for row in rows:
+        by_day.setdefault(timezone.localdate(row["created_at"]), []).append(row)
+    for day, day_rows in by_day.items():
+        _append(archive_path(model, day), day_rows)
+    _delete_ids(model, [row["id"] for row in rows])
+    return len(rows)
+
+
+def _read_day(model, day: date):
+    path = archive_path(model, day)
+    if not path.exists():
+        return
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _day_bounds(start: date, end: date) -> tuple[datetime, datetime]:
+    """Aware ``[start 00:00, day after end 00:00)`` in the local time zone."""
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def _matches(row: dict, user_id, actor_id, event_type) -> bool:
+    if user_id is not None or actor_id is not None:
+        if row.get("user_id") != user_id and (actor_id is None or row.get("actor_id") != actor_id):
+            return False
+    return not event_type or row.get("event_type") == event_type
+
+
+def iter_archived(
+    model,
+    start: date,
+    end: date,
+    *,
+    user_id: int | None = None,
+    actor_id: int | None = None,
+    event_type: str | None = None,
+    after=None,
+):
+    """Archived rows of ``model`` between two local days, newest first, one day file at a time.
+
+    ``user_id`` and ``actor_id`` keep rows about that user or performed by
+    that user; ``after`` is a ``(created_at, id)`` keyset cursor. Rows archived
+    twice by an interrupted run are yielded once.
+    """
+    fields = set(_fields(model))
+    day = end
+    if after is not None:
+        day = min(day, timezone.localdate(after[0]))
+    while day >= start:
+        rows = {}
+        for row in _read_day(model, day):
+            if not _matches(row, user_id, actor_id, event_type):
+                continue
+            row["created_at"] = parse_datetime(row["created_at"])
+            if after is not None and (row["created_at"], row["id"]) >= after:
+                continue
+            rows[row["id"]] = model(**{key: value for key, value in row.items() if key in fields})
+        yield from sorted(rows.values(), key=lambda item: (item.created_at, item.id), reverse=True)
+        day -= timedelta(days=1)
+
+
+def _prefetch(model, instances: list) -> list:
+    prefetch_related_objects(
+        instances, *[field.name for field in model._meta.concrete_fields if field.is_relation]
+    )
+    return instances
+
+
+def read_archived(model, start: date, end: date, *, limit: int | None = None, **filters) -> list:
+    """Archived rows as model instances (not bound to any row any more), newest first.
+
+    Day files are read from ``end`` backwards and reading stops once ``limit``
+    rows are found. Takes the filters of ``iter_archived``; foreign keys are
+    prefetched.
+    """
+    return _prefetch(model, list(islice(iter_archived(model, start, end, **filters), limit)))
+
+
+def _live_branches(model, user_id, actor_id):
+    if user_id is None and actor_id is None:
+        return [model.objects.all()]
+    branches = [model.objects.filter(user_id=user_id)] if user_id is not None else []
+    if actor_id is not None:
+        # Separate branch so each side keeps its own (owner, -created_at, -id) index.
+        branches.append(model.objects.filter(actor_id=actor_id).exclude(user_id=user_id))
+    return branches
+
+
+def logs_between(
+    model,
+    start: date,
+    end: date,
+    *,
+    user_id: int | None = None,
+    actor_id: int | None = None,
+    event_type: str | None = None,
+    after=None,
+    limit: int = 200,
+) -> tuple[list, str | None]:
+    """One page of live and archived rows of ``model`` between two local days, newest first.
+
+    Keyset-paged like the activity timeline: returns the rows and the cursor
+    of the next page (``None`` on the last one). Live rows are read with
+    aware datetime bounds so the ``-created_at`` indexes apply; at most
+    ``limit + 1`` rows are read from each source.
+    """
+    lower, upper = _day_bounds(start, end)
+    related = [field.name for field in model._meta.concrete_fields if field.is_relation]
+    sources = []
+    for queryset in _live_branches(model, user_id, actor_id):
+        queryset = queryset.filter(created_at__gte=lower, created_at__lt=upper)
+        if event_type:
+            queryset = queryset.filter(event_type=event_type)
+        queryset = keyset_filter(queryset, after).select_related(*related)
+        sources.append(list(queryset.order_by("-created_at", "-id")[: limit + 1]))
+    sources.append(
+        read_archived(
+            model,
+            start,
+            end,
+            user_id=user_id,
+            actor_id=actor_id,
+            event_type=event_type,
+            after=after,
+            limit=limit + 1,
+        )
+    )
+
+    rows, seen = [], set()
+    # A row can be both archived and live when an archive run was interrupted.
+    for row in merge(*sources, key=lambda item: (item.created_at, item.id), reverse=True):
+        if row.id in seen:
+            continue
+        seen.add(row.id)
+        rows.append(row)
+        if len(rows) > limit:
+            return rows[:limit], encode_cursor(rows[limit - 1])
+    return rows, None
@@ -0,0 +1,55 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance.logarchive import ARCHIVED_MODELS, archive_batch
+
+
+class Command(BaseCommand):
+    help = "Move old system logs and user activity into compressed daily archive files."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.LOG_RETENTION_DAYS,
+            help="Archive rows older than this many days.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows moved per delete transaction.",
+        )
+        parser.add_argument(
+            "--model",
+            choices=[*ARCHIVED_MODELS, "all"],
+            default="all",
+            help="Which log to archive.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count the rows that would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        names = list(ARCHIVED_MODELS) if options["model"] == "all" else [options["model"]]
+        for name in names:
+            model = ARCHIVED_MODELS[name]
+            if options["dry_run"]:
+                count = model.objects.filter(created_at__lt=cutoff).count()
+                self.stdout.write(f"{model.__name__}: {count} rows to archive.")
+                continue
+            moved = 0
+            while batch := archive_batch(model, cutoff, options["batch_size"]):
+                moved += batch
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{model.__name__}: {moved} rows archived "
+                    f"to {settings.LOG_ARCHIVE_ROOT}."
+                )
+            )
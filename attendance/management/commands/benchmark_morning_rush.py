@@ -0,0 +1,303 @@
+import io
+import json
+import logging
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.signals import got_request_exception
+from django.db import connections
+from django.utils import timezone
+
+from attendance.audit import flush_audit_log
+from attendance.models import AttendanceDay, Department, User
+from attendance.presence import tracker as presence_tracker
+from attendance.rollups import flush_rollups
+
+
+CSRF_TOKEN = "benchmarkcsrftokenbenchmarkcsrft"
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(values: list[float], share: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a morning rush of employee check-ins and supervisor verifications "
+        "against a freshly seeded SQLite copy served in-process, and write the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=300)
+        parser.add_argument("--threads", type=int, default=32, help="Concurrent clients.")
+        parser.add_argument(
+            "--server-threads",
+            type=int,
+            default=0,
+            help="Cap on concurrent server requests (0 = a thread per connection).",
+        )
+        parser.add_argument(
+            "--verify-every",
+            type=int,
+            default=25,
+            help="Queue a department verification after this many check-ins.",
+        )
+        parser.add_argument(
+            "--database",
+            help="SQLite file to create for the run (default: a temporary file).",
+        )
+        parser.add_argument("--output", help="JSON result file (default: stdout).")
+
+    def handle(self, *args, **options):
+        if settings.DATABASES["default"]["ENGINE"] != "django.db.backends.sqlite3":
+            raise CommandError("The morning rush benchmark targets SQLite.")
+
+        workdir = None
+        db_path = options["database"]
+        if not db_path:
+            workdir = tempfile.TemporaryDirectory(prefix="naumur-rush-")
+            db_path = str(Path(workdir.name) / "rush.sqlite3")
+        elif Path(db_path).exists():
+            raise CommandError(f"{db_path} already exists; pass a new file.")
+
+        try:
+            self._use_database(db_path)
+            employees, supervisors = self._seed(options["employees"])
+            result = self._run(employees, supervisors, options)
+        finally:
+            # Write what the in-process buffers hold while the database still exists.
+            presence_tracker.flush()
+            flush_audit_log()
+            flush_rollups()
+            connections.close_all()
+            if workdir:
+                workdir.cleanup()
+
+        result["config"] = {
+            "employees": len(employees),
+            "supervisors": len(supervisors),
+            "threads": options["threads"],
+            "server_threads": options["server_threads"] or None,
+            "verify_every": options["verify_every"],
+            "django": django.get_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "database_options": settings.DATABASES["default"].get("OPTIONS", {}),
+            "started_at": result.pop("started_at"),
+        }
+        payload = json.dumps(result, indent=2, default=str)
+        if options["output"]:
+            Path(options["output"]).write_text(payload + "\n", encoding="utf-8")
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    def _use_database(self, db_path: str) -> None:
+        connections.close_all()
+        # Connections opened by the server threads read this same settings dict.
+        settings.DATABASES["default"]["NAME"] = db_path
+        call_command("migrate", verbosity=0, interactive=False)
+        call_command("createcachetable", verbosity=0)
+
+    def _seed(self, count: int):
+        call_command("seed_data", stdout=io.StringIO())
+        today = timezone.localdate()
+        departments = list(Department.objects.filter(is_active=True))
+        existing = User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True).count()
+        password = make_password(None)
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"rush{index:05d}",
+                    first_name="Rush",
+                    last_name=f"{index:05d}",
+                    password=password,
+                    role=User.Roles.EMPLOYEE,
+                    department=departments[index % len(departments)],
+                    start_date=today,
+                )
+                for index in range(max(count - existing, 0))
+            ]
+        )
+        employees = list(
+            User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True).order_by("id")[:count]
+        )
+        AttendanceDay.objects.filter(date=today).delete()
+        supervisors = list(User.objects.filter(role=User.Roles.SUPERVISOR, is_active=True))
+        for supervisor in supervisors:
+            AttendanceDay.objects.create(
+                user=supervisor, date=today, arrival_time=timezone.localtime().time()
+            )
+        return employees, supervisors
+
+    def _session_cookie(self, user: User) -> str:
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        return f"{settings.SESSION_COOKIE_NAME}={session.session_key}; {settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}"
+
+    def _run(self, employees, supervisors, options) -> dict:
+        today = timezone.localdate()
+        arrival = "08:30"
+        cookies = {user.pk: self._session_cookie(user) for user in [*employees, *supervisors]}
+        departments = list(Department.objects.filter(is_active=True).values_list("id", flat=True))
+
+        errors = {"locked": 0, "other": 0}
+        errors_lock = threading.Lock()
+
+        def record_exception(sender, request=None, **kwargs):
+            exc = sys.exc_info()[1]
+            key = "locked" if exc and "database is locked" in str(exc) else "other"
+            with errors_lock:
+                errors[key] += 1
+
+        got_request_exception.connect(record_exception, weak=False)
+
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietRequestHandler, allow_reuse_address=False)
+        server.daemon_threads = True
+        handler = WSGIHandler()
+        if options["server_threads"]:
+            gate = threading.BoundedSemaphore(options["server_threads"])
+
+            def application(environ, start_response):
+                with gate:
+                    return handler(environ, start_response)
+
+            server.set_app(application)
+        else:
+            server.set_app(handler)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+
+        opener = urllib.request.build_opener(NoRedirect)
+
+        def post(kind, user_id, path, data):
+            request = urllib.request.Request(
+                base_url + path,
+                data=urllib.parse.urlencode(data).encode(),
+                headers={"Cookie": cookies[user_id], "X-CSRFToken": CSRF_TOKEN},
+            )
+            started = time.perf_counter()
+            try:
+                with opener.open(request) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as error:
+                status = error.code
+            return kind, user_id, status, time.perf_counter() - started
+
+        day = today.isoformat()
+        jobs = []
+        for index, employee in enumerate(employees, start=1):
+            jobs.append(
+                (
+                    "check_in",
+                    employee.pk,
+                    "/employee/",
+                    {
+                        "save_day": day,
+                        f"arrive_{day}": "on",
+                        f"arrive_time_{day}": arrival,
+                    },
+                )
+            )
+            if supervisors and departments and index % options["verify_every"] == 0:
+                supervisor = supervisors[index // options["verify_every"] % len(supervisors)]
+                department_id = departments[index // options["verify_every"] % len(departments)]
+                jobs.append(
+                    ("verify", supervisor.pk, "/supervisor/", {"verify_department": department_id})
+                )
+
+        # Failed requests are counted above; keep their tracebacks off the console.
+        request_logger = logging.getLogger("django.request")
+        log_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+
+        started_at = datetime.now().isoformat()
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["threads"]) as pool:
+                results = list(pool.map(lambda job: post(*job), jobs))
+        finally:
+            elapsed = time.perf_counter() - started
+            server.shutdown()
+            server.server_close()
+            got_request_exception.disconnect(record_exception)
+            request_logger.setLevel(log_level)
+
+        by_kind = {}
+        for kind, _user_id, status, seconds in results:
+            stats = by_kind.setdefault(kind, {"latencies": [], "statuses": {}})
+            stats["latencies"].append(seconds)
+            stats["statuses"][str(status)] = stats["statuses"].get(str(status), 0) + 1
+
+        accepted = {user_id for kind, user_id, status, _s in results if kind == "check_in" and status == 302}
+        stored = set(
+            AttendanceDay.objects.filter(
+                date=today, user_id__in=accepted, arrival_time__isnull=False
+            ).values_list("user_id", flat=True)
+        )
+
+        latencies = [seconds for *_rest, seconds in results]
+        return {
+            "started_at": started_at,
+            "requests": len(results),
+            "seconds": round(elapsed, 3),
+            "throughput_rps": round(len(results) / elapsed, 1) if elapsed else None,
+            "latency_ms": self._latency(latencies),
+            "by_kind": {
+                kind: {"latency_ms": self._latency(stats["latencies"]), "statuses": stats["statuses"]}
+                for kind, stats in by_kind.items()
+            },
+            "database_locked_errors": errors["locked"],
+            "other_errors": errors["other"],
+            "accepted_check_ins": len(accepted),
+            "lost_updates": len(accepted - stored),
+            "verified_rows": AttendanceDay.objects.filter(
+                date=today, verified_by__isnull=False, user__role=User.Roles.EMPLOYEE
+            ).count(),
+        }
+
+    def _latency(self, values: list[float]) -> dict:
+        return {
+            label: round(value * 1000, 1) if value is not None else None
+            for label, value in (
+                ("p50", percentile(values, 0.50)),
+                ("p95", percentile(values, 0.95)),
+                ("p99", percentile(values, 0.99)),
+                ("max", max(values) if values else None),
+            )
+        }
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
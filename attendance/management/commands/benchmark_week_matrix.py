@@ -0,0 +1,97 @@
+import random
+import time
+import tracemalloc
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+
+from attendance.utils import get_week_days, get_week_start
+from attendance.weekmatrix import fill_week_tables
+
+
+def dict_week_tables(chunks, week_days, dept_map, unassigned):
+    """Previous matrix layout: a dict per row and a six-key dict per cell."""
+    for employees, records in chunks:
+        for user_id, username, first_name, last_name, dept_id, _dept_name, _unassigned in employees:
+            row = {"employee": (user_id, username, first_name, last_name), "cells": []}
+            for day in week_days:
+                record = records.get((user_id, day))
+                row["cells"].append(
+                    {
+                        "date": day,
+                        "arrival": record[0] if record else None,
+                        "departure": record[1] if record else None,
+                        "verified_by": (record[3], record[4]) if record else None,
+                        "verified_at": record[5] if record else None,
+                        "is_verified": bool(record and record[2]),
+                    }
+                )
+            dept_map.get(dept_id, unassigned)["rows"].append(row)
+
+
+class Command(BaseCommand):
+    help = "Compare memory and time of the slotted week matrix with the dict layout."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=5000)
+        parser.add_argument("--departments", type=int, default=10)
+        parser.add_argument(
+            "--fill",
+            type=float,
+            default=0.7,
+            help="Share of employee days that have an attendance row.",
+        )
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        chunks, week_days = self._synthetic_week(options)
+        for label, builder in (("dict", dict_week_tables), ("slotted", fill_week_tables)):
+            peak, seconds = self._measure(builder, chunks, week_days, options)
+            self.stdout.write(
+                f"{label:8} peak {peak / 1024:10.1f} KiB  best {seconds * 1000:8.1f} ms"
+            )
+
+    def _synthetic_week(self, options):
+        rng = random.Random(options["seed"])
+        week_days = get_week_days(get_week_start(date.today()))
+        employees = []
+        records = {}
+        verified_at = datetime(2026, 1, 1, 17, tzinfo=dt_timezone.utc)
+        for user_id in range(1, options["employees"] + 1):
+            dept_id = user_id % options["departments"] + 1
+            employees.append(
+                (user_id, f"employee{user_id}", "First", f"Last{user_id}", dept_id, "", 0)
+            )
+            for day in week_days[:5]:
+                if rng.random() < options["fill"]:
+                    records[(user_id, day)] = (
+                        dt_time(8, rng.randrange(60)),
+                        dt_time(17, rng.randrange(60)),
+                        1,
+                        "Super",
+                        "Visor",
+                        verified_at + timedelta(days=day.weekday()),
+                    )
+        return [(employees, records)], week_days
+
+    def _measure(self, builder, chunks, week_days, options):
+        def run():
+            dept_map = {
+                dept_id: {"rows": []} for dept_id in range(1, options["departments"] + 1)
+            }
+            builder(chunks, week_days, dept_map, {"rows": []})
+
+        best = None
+        for _attempt in range(options["repeat"]):
+            started = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        # Memory is traced in a separate run so tracing does not skew the timings.
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak, best
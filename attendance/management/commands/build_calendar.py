@@ -0,0 +1,40 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.models import PublicHoliday
+from attendance.utils import parse_date
+from attendance.workcalendar import CALENDAR_START, cameroon_holidays, rebuild_calendar
+
+
+class Command(BaseCommand):
+    help = "Build the working calendar table used for expected working days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First calendar day (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Last calendar day (YYYY-MM-DD).")
+        parser.add_argument(
+            "--holidays",
+            action="store_true",
+            help="Register Cameroon's fixed and Easter-based public holidays first.",
+        )
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"]) or CALENDAR_START
+        end = parse_date(options["end"]) or date(date.today().year + 1, 12, 31)
+        if start > end:
+            raise CommandError("Start date must be before end date.")
+
+        if options["holidays"]:
+            holidays = [
+                PublicHoliday(date=day, name=name)
+                for year in range(start.year, end.year + 1)
+                for day, name in cameroon_holidays(year)
+            ]
+            PublicHoliday.objects.bulk_create(holidays, ignore_conflicts=True)
+
+        days = rebuild_calendar(start, end)
+        holidays = PublicHoliday.objects.filter(date__range=(start, end)).count()
+        self.stdout.write(
+            self.style.SUCCESS(f"Calendar built: {days} days, {holidays} public holidays.")
+        )
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from attendance.models import AttendanceDay, SystemLog, User
+from attendance.pendingfeed import latest_changes
+from attendance.timeline import TIMELINE_PAGE_SIZE, timeline_queries
+from attendance.verification import pending_attendance
+
+
+def plan_checks():
+    """(label, queryset, index the plan must use, whether it must also supply the order)."""
+    today = timezone.localdate()
+    now = timezone.now()
+    week_ago = now - timedelta(days=7)
+    subject = User(id=1)
+    own, _performed = timeline_queries(subject)
+    own_after, performed_after = timeline_queries(subject, after=(week_ago, 1))
+    return [
+        (
+            "profile timeline",
+            own[: TIMELINE_PAGE_SIZE + 1],
+            "activity_user_recent_idx",
+            True,
+        ),
+        (
+            "profile timeline, deep page",
+            own_after[: TIMELINE_PAGE_SIZE + 1],
+            "activity_user_recent_idx",
+            True,
+        ),
+        (
+            "actions performed, deep page",
+            performed_after[: TIMELINE_PAGE_SIZE + 1],
+            "activity_actor_recent_idx",
+            True,
+        ),
+        (
+            "profile timeline by date",
+            own.filter(created_at__gte=week_ago, created_at__lt=now)[: TIMELINE_PAGE_SIZE + 1],
+            "activity_user_recent_idx",
+            True,
+        ),
+        (
+            "system log changelist",
+            SystemLog.objects.order_by("-created_at", "-id")[:100],
+            "systemlog_recent_idx",
+            True,
+        ),
+        (
+            "system log by date",
+            SystemLog.objects.filter(created_at__gte=week_ago, created_at__lt=now).order_by(
+                "-created_at", "-id"
+            ),
+            "systemlog_recent_idx",
+            True,
+        ),
+        (
+            "system log by event type",
+            SystemLog.objects.filter(event_type=SystemLog.EVENT_LOGIN, created_at__gte=week_ago)
+            .order_by("-created_at", "-id"),
+            "systemlog_event_idx",
+            True,
+        ),
+        (
+            "pending queue",
+            pending_attendance(today).select_related("user"),
+            "attendance_pending_idx",
+            False,
+        ),
+        (
+            "pending feed",
+            AttendanceDay.objects.filter(
+                date=today,
+                updated_at__gte=now,
+                user__role=User.Roles.EMPLOYEE,
+                user__is_active=True,
+            ).order_by("updated_at", "id"),
+            "attendance_changed_idx",
+            False,
+        ),
+        (
+            "pending feed change check",
+            latest_changes(today)[:1],
+            "attendance_changed_idx",
+            True,
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Fail when a hot timeline or queue query stops using its index (SQLite only)."
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            self.stdout.write(self.style.WARNING("Query plans are only checked on SQLite."))
+            return
+
+        failures = []
+        for label, queryset, index, ordered in plan_checks():
+            plan = queryset.explain()
+            problems = []
+            if index not in plan:
+                problems.append(f"does not use {index}")
+            if ordered and "TEMP B-TREE" in plan:
+                problems.append("sorts in a temporary b-tree")
+            if problems:
+                failures.append(f"{label}: {', '.join(problems)}\n{plan}")
+                self.stdout.write(self.style.ERROR(f"FAIL {label}"))
+            else:
+                self.stdout.write(f"ok   {label}")
+            if options["verbosity"] > 1:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError("Query plan regressions:\n\n" + "\n\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("All query plans use their indexes."))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from attendance.exports import range_weeks
+from attendance.models import AttendanceDay, WeekSnapshot
+from attendance.snapshots import freeze_week, week_is_closed
+from attendance.utils import parse_date
+
+
+class Command(BaseCommand):
+    help = "Store snapshots of closed, fully verified weeks ahead of the first view."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", help="First day to cover (YYYY-MM-DD).")
+        parser.add_argument("--end", help="Last day to cover (YYYY-MM-DD).")
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Rebuild snapshots that already exist.",
+        )
+
+    def handle(self, *args, **options):
+        first_day = AttendanceDay.objects.order_by("date").values_list("date", flat=True).first()
+        start = parse_date(options["start"]) or first_day
+        end = parse_date(options["end"]) or timezone.localdate()
+        if start is None:
+            self.stdout.write("No attendance recorded yet.")
+            return
+        if start > end:
+            raise CommandError("Start date must be before end date.")
+
+        existing = set(WeekSnapshot.objects.values_list("week_start", flat=True))
+        frozen = skipped = 0
+        for week_start in range_weeks(start, end):
+            if week_start in existing and not options["refresh"]:
+                continue
+            if not week_is_closed(week_start):
+                skipped += 1
+                continue
+            freeze_week(week_start)
+            frozen += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Weeks frozen: {frozen} ({skipped} still open or unverified).")
+        )
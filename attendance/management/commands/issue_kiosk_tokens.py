@@ -0,0 +1,32 @@
+import csv
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from attendance.kiosk import issue_kiosk_token
+from attendance.models import User
+
+
+class Command(BaseCommand):
+    help = "Print signed kiosk badge tokens as CSV (username,token,expires_at)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*", help="Defaults to every active employee.")
+        parser.add_argument("--department", help="Department code to limit the employees to.")
+
+    def handle(self, *args, **options):
+        employees = User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True)
+        if options["usernames"]:
+            employees = employees.filter(username__in=options["usernames"])
+        if options["department"]:
+            employees = employees.filter(department__code=options["department"])
+
+        expires_at = timezone.now() + timedelta(seconds=settings.KIOSK_TOKEN_MAX_AGE)
+        writer = csv.writer(self.stdout, lineterminator="\n")
+        writer.writerow(["username", "token", "expires_at"])
+        for employee in employees.order_by("username"):
+            writer.writerow(
+                [employee.username, issue_kiosk_token(employee), expires_at.isoformat()]
+            )
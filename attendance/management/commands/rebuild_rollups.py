@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from attendance.rollups import drain_dirty_rollups, rebuild_all_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the employee and department attendance rollups from raw attendance."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of employees rebuilt per batch.",
+        )
+        parser.add_argument(
+            "--pending",
+            action="store_true",
+            help="Only refresh the attendance days recorded as dirty.",
+        )
+
+    def handle(self, *args, **options):
+        if options["pending"]:
+            drained = drain_dirty_rollups()
+            self.stdout.write(self.style.SUCCESS(f"Rollups refreshed for {drained} attendance days."))
+            return
+        employee_rows, department_rows = rebuild_all_rollups(options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rollups rebuilt: {employee_rows} employee rows, {department_rows} department rows."
+            )
+        )
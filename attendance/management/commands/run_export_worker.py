@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from attendance.audit import log_event
+from attendance.exportjobs import claim_next_job, prune_jobs, reset_stale_jobs, run_job
+from attendance.models import ExportJob, SystemLog
+
+
+class Command(BaseCommand):
+    help = "Generate queued history exports and keep their files under MEDIA_ROOT."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process the queued jobs and exit instead of polling.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            default=0,
+            help="Exit after this many jobs (0 means no limit).",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=30,
+            help="Requeue running jobs started longer ago than this.",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=7,
+            help="Delete finished jobs and their files after this many days.",
+        )
+
+    def handle(self, *args, **options):
+        requeued = reset_stale_jobs(timedelta(minutes=options["stale_minutes"]))
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs."))
+        pruned = prune_jobs(timedelta(days=options["keep_days"]))
+        if pruned:
+            self.stdout.write(f"Pruned {pruned} old jobs.")
+
+        processed = 0
+        while not options["max_jobs"] or processed < options["max_jobs"]:
+            job = claim_next_job()
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            run_job(job)
+            processed += 1
+            if job.status == ExportJob.Status.DONE:
+                log_event(
+                    SystemLog.EVENT_EXPORT,
+                    f"Export job {job.id} generated {job.filename}",
+                    meta={**job.params, "fmt": job.fmt, "job": job.id, **job.meta},
+                )
+                self.stdout.write(self.style.SUCCESS(f"Job {job.id}: {job.artifact.name}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Job {job.id} failed: {job.error}"))
+
+        self.stdout.write(f"Processed {processed} jobs.")
@@ -2,6 +2,7 @@ import random
 from datetime import date, datetime, timedelta
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils import timezone
 
 from attendance.models import AttendanceDay, Department, User
@@ -117,31 +118,32 @@ class Command(BaseCommand):
         end_date = date(2026, 2, 28)
         rng = random.Random(42)
 
-        for day_offset in range((end_date - start_date).days + 1):
-            current_day = start_date + timedelta(days=day_offset)
-            if current_day.weekday() >= 5:
-                continue
-            for employee in employees:
-                if rng.random() < 0.15:
+        with transaction.atomic():
+            for day_offset in range((end_date - start_date).days + 1):
+                current_day = start_date + timedelta(days=day_offset)
+                if current_day.weekday() >= 5:
                     continue
+                for employee in employees:
+                    if rng.random() < 0.15:
+                        continue
 
-                attendance, _ = AttendanceDay.objects.get_or_create(
-                    user=employee, date=current_day
-                )
-                start_minute = rng.randint(0, 20)
-                attendance.arrival_time = time_with_offset(WORK_START_TIME, start_minute)
-
-                end_time = INTERN_END_TIME if employee.is_intern else WORK_END_TIME
-                end_minute = rng.randint(-10, 10)
-                attendance.departure_time = time_with_offset(end_time, end_minute)
-
-                if rng.random() < 0.7 and supervisors:
-                    supervisor = rng.choice(supervisors)
-                    attendance.verified_by = supervisor
-                    attendance.verified_at = timezone.make_aware(
-                        datetime.combine(current_day, time_with_offset(WORK_START_TIME, 60))
+                    attendance, _ = AttendanceDay.objects.get_or_create(
+                        user=employee, date=current_day
                     )
-                attendance.save()
+                    start_minute = rng.randint(0, 20)
+                    attendance.arrival_time = time_with_offset(WORK_START_TIME, start_minute)
+
+                    end_time = INTERN_END_TIME if employee.is_intern else WORK_END_TIME
+                    end_minute = rng.randint(-10, 10)
+                    attendance.departure_time = time_with_offset(end_time, end_minute)
+
+                    if rng.random() < 0.7 and supervisors:
+                        supervisor = rng.choice(supervisors)
+                        attendance.verified_by = supervisor
+                        attendance.verified_at = timezone.make_aware(
+                            datetime.combine(current_day, time_with_offset(WORK_START_TIME, 60))
+                        )
+                    attendance.save()
 
         self.stdout.write(self.style.SUCCESS("Seed data created."))
 
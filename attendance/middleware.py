@@ -1,12 +1,12 @@
-from datetime import timedelta, datetime, timezone as dt_timezone
-
 from django.utils import timezone
 
-from .models import UserDailyLogin, UserSession
+from .presence import tracker
 from .utils import get_client_ip
 
 
 class ActivityMiddleware:
+    """Record each authenticated request with the in-memory presence tracker."""
+
     def __init__(self, get_response):
         self.get_response = get_response
 
@@ -16,30 +16,10 @@ class ActivityMiddleware:
             return response
 
         now = timezone.now()
-        last_seen_ts = request.session.get("last_seen_ts")
-        if last_seen_ts:
-            last_seen = datetime.fromtimestamp(last_seen_ts, tz=dt_timezone.utc)
-            if now - last_seen < timedelta(minutes=1):
-                return response
-
-        request.session["last_seen_ts"] = int(now.timestamp())
-        today = timezone.localdate()
-        ip_address = get_client_ip(request)
-
-        UserDailyLogin.objects.update_or_create(
-            user=request.user,
-            date=today,
-            defaults={
-                "last_seen_at": now,
-                "last_ip": ip_address,
-                "online": True,
-            },
+        tracker.touch(
+            request.user.id, request.session.session_key or "", get_client_ip(request), now
         )
-
-        session_key = request.session.session_key
-        if session_key:
-            UserSession.objects.filter(
-                user=request.user, session_key=session_key, is_active=True
-            ).update(last_seen_at=now, ip_address=ip_address)
-
+        today = timezone.localdate(now).isoformat()
+        if request.session.get("seen_on") != today:
+            request.session["seen_on"] = today
         return response
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:25
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_absencejustification_approved_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('verified_days', models.PositiveIntegerField(default=0)),
+                ('worked_duration', models.DurationField(default=datetime.timedelta)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='attendance.department')),
+            ],
+            options={
+                'ordering': ['-period_start'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('department', 'period', 'period_start'), name='unique_department_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day'), ('month', 'Month')], max_length=10)),
+                ('period_start', models.DateField()),
+                ('present_days', models.PositiveIntegerField(default=0)),
+                ('verified_days', models.PositiveIntegerField(default=0)),
+                ('worked_duration', models.DurationField(default=datetime.timedelta)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-period_start'],
+                'abstract': False,
+                'constraints': [models.UniqueConstraint(fields=('user', 'period', 'period_start'), name='unique_employee_rollup')],
+            },
+        ),
+    ]
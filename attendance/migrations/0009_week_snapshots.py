@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_export_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeekSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField(unique=True)),
+                ('payload', models.BinaryField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('employee_count', models.PositiveIntegerField(default=0)),
+                ('record_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-week_start'],
+            },
+        ),
+    ]
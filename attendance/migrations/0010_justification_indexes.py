@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_week_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='absencejustification',
+            index=models.Index(fields=['start_date', 'id'], name='justification_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='absencejustification',
+            index=models.Index(fields=['status', 'start_date', 'id'], name='justification_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='absencejustification',
+            index=models.Index(fields=['status', 'end_date'], name='justification_end_idx'),
+        ),
+    ]
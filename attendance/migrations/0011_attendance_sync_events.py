@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0010_justification_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSyncEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('client_event_id', models.CharField(max_length=64)),
+                ('action', models.CharField(choices=[('arrive', 'Arrival'), ('depart', 'Departure')], max_length=10)),
+                ('date', models.DateField()),
+                ('client_time', models.TimeField()),
+                ('recorded_at', models.DateTimeField()),
+                ('outcome', models.CharField(choices=[('applied', 'Applied'), ('unchanged', 'Unchanged'), ('superseded', 'Superseded'), ('rejected', 'Rejected')], max_length=20)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sync_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-received_at'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'client_event_id'), name='unique_sync_event')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0012_audit_log_timestamps'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendanceday',
+            index=models.Index(condition=models.Q(('verified_by__isnull', True)), fields=['date'], name='attendance_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceday',
+            index=models.Index(fields=['date', 'updated_at'], name='attendance_changed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['-created_at', '-id'], name='systemlog_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['event_type', '-created_at', '-id'], name='systemlog_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='useractivity',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='activity_user_recent_idx'),
+        ),
+    ]
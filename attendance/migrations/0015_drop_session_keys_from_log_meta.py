@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def drop_session_keys(apps, schema_editor):
+    # Login and logout rows used to record the session key, which is enough
+    # to take over the session for anyone who can read the log.
+    for model_name in ("SystemLog", "UserActivity"):
+        model = apps.get_model("attendance", model_name)
+        rows = model.objects.filter(event_type__in=["login", "logout"]).only("id", "meta")
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            if isinstance(row.meta, dict) and row.meta.pop("session_key", None) is not None:
+                batch.append(row)
+        model.objects.bulk_update(batch, ["meta"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0014_activity_actor_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_session_keys, migrations.RunPython.noop),
+    ]
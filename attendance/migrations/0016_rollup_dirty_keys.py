@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:39
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    # 0006 created the rollup tables empty; fill them from existing attendance.
+    from attendance.rollups import rebuild_all_rollups
+
+    rebuild_all_rollups(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0015_drop_session_keys_from_log_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupDirtyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(null=True)),
+                ('day', models.DateField(null=True)),
+                ('department_id', models.BigIntegerField(null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
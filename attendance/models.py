@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import time
+from datetime import time, timedelta
 
 from django.contrib.auth.models import AbstractUser
 from django.db import models
@@ -136,11 +136,54 @@ class AbsenceJustification(models.Model):
 
     class Meta:
         ordering = ["-start_date", "user__last_name"]
+        indexes = [
+            models.Index(fields=["start_date", "id"], name="justification_start_idx"),
+            models.Index(
+                fields=["status", "start_date", "id"], name="justification_status_idx"
+            ),
+            models.Index(fields=["status", "end_date"], name="justification_end_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} - {self.start_date.isoformat()} to {self.end_date.isoformat()}"
 
 
+class AttendanceDayQuerySet(models.QuerySet):
+    """Keeps rollups and week snapshots in step with bulk writes that bypass signals."""
+
+    def update(self, **kwargs):
+        kwargs.setdefault("updated_at", timezone.now())
+        keys = list(self.order_by().values_list("user_id", "date"))
+        updated = super().update(**kwargs)
+        if keys:
+            _attendance_changed(keys)
+        return updated
+
+    def update_unhooked(self, **kwargs):
+        """``update`` for callers that report the changed keys themselves."""
+        kwargs.setdefault("updated_at", timezone.now())
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        _attendance_changed([(obj.user_id, obj.date) for obj in created])
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        _attendance_changed([(obj.user_id, obj.date) for obj in objs])
+        return updated
+
+
+def _attendance_changed(keys: list) -> None:
+    from .rollups import schedule_rollup_refresh
+    from .snapshots import schedule_snapshot_invalidation
+
+    schedule_rollup_refresh(keys)
+    schedule_snapshot_invalidation(day for _user_id, day in keys)
+
+
 class AttendanceDay(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="attendances")
     date = models.DateField()
@@ -157,11 +200,22 @@ class AttendanceDay(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AttendanceDayQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "user__last_name", "user__first_name"]
         constraints = [
             models.UniqueConstraint(fields=["user", "date"], name="unique_attendance_day")
         ]
+        indexes = [
+            # Only unverified rows: the pending queue and the closed-week check.
+            models.Index(
+                fields=["date"],
+                condition=models.Q(verified_by__isnull=True),
+                name="attendance_pending_idx",
+            ),
+            models.Index(fields=["date", "updated_at"], name="attendance_changed_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} - {self.date.isoformat()}"
@@ -175,6 +229,202 @@ class AttendanceDay(models.Model):
         return self.verified_by is not None
 
 
+class AttendanceRollup(models.Model):
+    class Periods(models.TextChoices):
+        DAY = "day", _("Day")
+        MONTH = "month", _("Month")
+
+    period = models.CharField(max_length=10, choices=Periods.choices)
+    period_start = models.DateField()
+    present_days = models.PositiveIntegerField(default=0)
+    verified_days = models.PositiveIntegerField(default=0)
+    worked_duration = models.DurationField(default=timedelta)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        ordering = ["-period_start"]
+
+
+class EmployeeRollup(AttendanceRollup):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="rollups")
+
+    class Meta(AttendanceRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "period", "period_start"], name="unique_employee_rollup"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.period} {self.period_start.isoformat()}"
+
+
+class DepartmentRollup(AttendanceRollup):
+    """Attendance of the active employees currently assigned to a department."""
+
+    department = models.ForeignKey(
+        Department, on_delete=models.CASCADE, related_name="rollups"
+    )
+
+    class Meta(AttendanceRollup.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                fields=["department", "period", "period_start"],
+                name="unique_department_rollup",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.department} - {self.period} {self.period_start.isoformat()}"
+
+
+class RollupDirtyKey(models.Model):
+    """An attendance day (or a department) whose rollups still need recomputing.
+
+    Rows are written in the transaction that changes the attendance and
+    deleted once the refresh has run, so a refresh lost with its process is
+    picked up by the next one. No foreign keys: a deleted user or department
+    still has to be taken out of the totals.
+    """
+
+    user_id = models.BigIntegerField(null=True)
+    day = models.DateField(null=True)
+    department_id = models.BigIntegerField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        if self.user_id is None:
+            return f"Department {self.department_id}"
+        return f"User {self.user_id} - {self.day.isoformat()}"
+
+
+class PublicHoliday(models.Model):
+    date = models.DateField(unique=True)
+    name = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.date.isoformat()})"
+
+
+class CalendarDay(models.Model):
+    date = models.DateField(unique=True)
+    is_working_day = models.BooleanField()
+    holiday = models.ForeignKey(
+        PublicHoliday, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    # Working days from the first calendar day up to and including this one.
+    working_day_number = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self) -> str:
+        return self.date.isoformat()
+
+
+class WeekSnapshot(models.Model):
+    week_start = models.DateField(unique=True)
+    payload = models.BinaryField()
+    content_hash = models.CharField(max_length=64)
+    employee_count = models.PositiveIntegerField(default=0)
+    record_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-week_start"]
+
+    def __str__(self) -> str:
+        return f"Snapshot {self.week_start.isoformat()}"
+
+
+class ExportJob(models.Model):
+    class Kinds(models.TextChoices):
+        WEEK = "week", _("Week")
+        RANGE = "range", _("Date range")
+
+    class Formats(models.TextChoices):
+        CSV = "csv", "CSV"
+        XLSX = "xlsx", "XLSX"
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    kind = models.CharField(max_length=10, choices=Kinds.choices)
+    fmt = models.CharField(max_length=10, choices=Formats.choices)
+    params = models.JSONField(default=dict, blank=True)
+    cache_key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    requested_by = models.ForeignKey(
+        User,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="export_jobs",
+    )
+    artifact = models.FileField(upload_to="exports/", blank=True)
+    filename = models.CharField(max_length=255)
+    meta = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["cache_key", "fingerprint"], name="exportjob_cache_idx"),
+            models.Index(fields=["status", "created_at"], name="exportjob_queue_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.status})"
+
+
+class AttendanceSyncEvent(models.Model):
+    """A queued client check-in/out, kept so a replayed batch is applied once."""
+
+    class Actions(models.TextChoices):
+        ARRIVE = "arrive", _("Arrival")
+        DEPART = "depart", _("Departure")
+
+    class Outcomes(models.TextChoices):
+        APPLIED = "applied", _("Applied")
+        UNCHANGED = "unchanged", _("Unchanged")
+        SUPERSEDED = "superseded", _("Superseded")
+        REJECTED = "rejected", _("Rejected")
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sync_events")
+    client_event_id = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=Actions.choices)
+    date = models.DateField()
+    client_time = models.TimeField()
+    recorded_at = models.DateTimeField()
+    outcome = models.CharField(max_length=20, choices=Outcomes.choices)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-received_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "client_event_id"], name="unique_sync_event"
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.action} {self.date.isoformat()}"
+
+
 class UserSession(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="sessions")
     session_key = models.CharField(max_length=100, db_index=True)
@@ -227,10 +477,17 @@ class SystemLog(models.Model):
     )
     ip_address = models.CharField(max_length=64, blank=True)
     meta = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded, not when a buffered batch is written.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="systemlog_recent_idx"),
+            models.Index(
+                fields=["event_type", "-created_at", "-id"], name="systemlog_event_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.event_type} - {self.created_at.isoformat()}"
@@ -250,10 +507,14 @@ class UserActivity(models.Model):
     event_type = models.CharField(max_length=50)
     message = models.CharField(max_length=255)
     meta = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-id"], name="activity_user_recent_idx"),
+            models.Index(fields=["actor", "-created_at", "-id"], name="activity_actor_recent_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user} - {self.event_type}"
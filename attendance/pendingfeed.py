@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AttendanceDay, User
+
+logger = logging.getLogger(__name__)
+
+FEED_POLL_SECONDS = 1
+FEED_HEARTBEAT_SECONDS = 15
+# Streams end after this long and EventSource reconnects with Last-Event-ID,
+# which also moves long-lived connections onto the new day after midnight.
+FEED_MAX_SECONDS = 300
+FEED_RETRY_MS = 3000
+
+
+def latest_changes(day):
+    """``updated_at`` of ``day``'s rows, newest first; its first row is one index seek."""
+    return (
+        AttendanceDay.objects.filter(date=day)
+        .order_by("-updated_at")
+        .values_list("updated_at", flat=True)
+    )
+
+
+def pending_changes(day, since: datetime, department_id=None) -> list[AttendanceDay]:
+    """Employee rows of ``day`` saved at or after ``since``, oldest change first."""
+    changes = AttendanceDay.objects.filter(
+        date=day,
+        updated_at__gte=since,
+        user__role=User.Roles.EMPLOYEE,
+        user__is_active=True,
+    )
+    if department_id:
+        changes = changes.filter(user__department_id=department_id)
+    return list(changes.select_related("user", "user__department").order_by("updated_at", "id"))
+
+
+def _change_event(record: AttendanceDay) -> str:
+    payload = {"id": record.id}
+    if record.arrival_time is not None and record.verified_by_id is None:
+        payload["status"] = "pending"
+        payload["html"] = render_to_string(
+            "partials/supervisor_pending_row.html", {"record": record}
+        )
+    else:
+        payload["status"] = "done"
+    return (
+        f"id: {record.updated_at.isoformat()}\n"
+        "event: attendance\n"
+        f"data: {json.dumps(payload)}\n\n"
+    )
+
+
+def _change_events(day, since: datetime, department_id=None) -> tuple[list[str], datetime]:
+    records = pending_changes(day, since, department_id)
+    if records:
+        since = records[-1].updated_at
+    return [_change_event(record) for record in records], since
+
+
+def _start(last_event_id: str | None) -> datetime | None:
+    try:
+        since = parse_datetime(last_event_id or "")
+    except ValueError:
+        return None
+    if since is None or timezone.is_naive(since):
+        return None
+    return min(since, timezone.now())
+
+
+class ChangePoller:
+    """One poll of today's newest ``updated_at`` per process, shared by every open stream.
+
+    Each stream subscribes an ``asyncio.Event`` that is set when the version
+    moves, so N open tabs cost one query per poll instead of N. The polling
+    task starts with the first subscriber and stops after the last one leaves.
+    """
+
+    def __init__(self):
+        self._subscribers: set[asyncio.Event] = set()
+        self._task = None
+        self._version = None
+
+    def subscribe(self) -> asyncio.Event:
+        # Set from the start, so a new stream reads what changed since it opened.
+        changed = asyncio.Event()
+        changed.set()
+        self._subscribers.add(changed)
+        if (
+            self._task is None
+            or self._task.done()
+            or self._task.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._task = asyncio.create_task(self._run())
+        return changed
+
+    def unsubscribe(self, changed: asyncio.Event) -> None:
+        self._subscribers.discard(changed)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            day = timezone.localdate()
+            try:
+                version = (day, await latest_changes(day).afirst())
+            except Exception:
+                logger.exception("Pending feed poll failed")
+                version = self._version
+            if version != self._version:
+                self._version = version
+                for changed in self._subscribers:
+                    changed.set()
+            await asyncio.sleep(FEED_POLL_SECONDS)
+
+
+poller = ChangePoller()
+
+
+async def pending_events(last_event_id: str | None = None, department_id: int | None = None):
+    """Server-Sent Events for today's pending queue.
+
+    Each event carries one changed row: the rendered table row while it
+    waits for verification, or just its id once it is verified or cleared.
+    ``last_event_id`` is the ``Last-Event-ID`` of a reconnect or the time the
+    page was rendered, so nothing saved before the stream opened is missed.
+    Open streams only read the changed rows when the shared ``poller`` sees
+    the newest ``updated_at`` of the day move.
+    """
+    day = timezone.localdate()
+    since = _start(last_event_id) or timezone.now()
+    started = last_beat = time.monotonic()
+
+    yield f"retry: {FEED_RETRY_MS}\n\n"
+    changed = poller.subscribe()
+    try:
+        while time.monotonic() - started < FEED_MAX_SECONDS:
+            wait = min(
+                FEED_HEARTBEAT_SECONDS - (time.monotonic() - last_beat),
+                FEED_MAX_SECONDS - (time.monotonic() - started),
+            )
+            try:
+                await asyncio.wait_for(changed.wait(), max(wait, 0))
+            except asyncio.TimeoutError:
+                if time.monotonic() - last_beat >= FEED_HEARTBEAT_SECONDS:
+                    yield ": keepalive\n\n"
+                    last_beat = time.monotonic()
+                continue
+            changed.clear()
+            events, since = await sync_to_async(_change_events)(day, since, department_id)
+            for event in events:
+                yield event
+                last_beat = time.monotonic()
+    finally:
+        poller.unsubscribe(changed)
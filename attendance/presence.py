@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .dbretry import retry_write
+from .flushing import BackgroundFlusher
+from .models import UserDailyLogin, UserSession
+
+logger = logging.getLogger(__name__)
+
+
+class PresenceTracker(BackgroundFlusher):
+    """Last-seen time and IP of signed-in users, kept in memory and written in bulk.
+
+    ``touch`` runs on every authenticated request and only updates two dicts.
+    Every ``PRESENCE_FLUSH_SECONDS`` the latest sighting of each session is
+    written in one transaction: one upsert of ``UserDailyLogin`` rows and one
+    batched ``UserSession`` UPDATE. Both are tracked per session, so logging
+    out of one session leaves the user's other sessions online.
+    """
+
+    thread_name = "presence-flusher"
+
+    def __init__(self):
+        super().__init__()
+        # (user_id, session_key) -> (seen_at, ip_address), waiting to be written.
+        self._pending = {}
+        self._pending_since = None
+        # (user_id, session_key) -> seen_at, what this process serves online status from.
+        self._last_seen = {}
+        self.flushed = 0
+        self.flushes = 0
+
+    def touch(self, user_id: int, session_key: str, ip_address: str, now) -> None:
+        with self._lock:
+            first = not self._pending
+            self._pending[(user_id, session_key)] = (now, ip_address)
+            self._last_seen[(user_id, session_key)] = now
+            if first:
+                self._pending_since = time.monotonic()
+        if first:
+            self.ensure_thread()
+            self.wake()
+
+    def forget(self, user_id: int, session_key: str) -> None:
+        """Drop a session that logged out, so a later flush cannot mark it online."""
+        with self._lock:
+            self._pending.pop((user_id, session_key), None)
+            self._last_seen.pop((user_id, session_key), None)
+
+    def recent_user_ids(self, since) -> set[int]:
+        with self._lock:
+            return {
+                user_id for (user_id, _session_key), seen_at in self._last_seen.items()
+                if seen_at >= since
+            }
+
+    def next_due_in(self) -> float | None:
+        with self._lock:
+            if not self._pending:
+                return None
+            age = time.monotonic() - self._pending_since
+        return settings.PRESENCE_FLUSH_SECONDS - age
+
+    def flush(self) -> int:
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._pending_since = None
+        if not pending:
+            return 0
+        try:
+            _write_presence(pending)
+        except Exception:
+            logger.exception("Presence flush of %s sessions failed", len(pending))
+            with self._lock:
+                # Sightings recorded meanwhile are newer; keep those.
+                for key, value in pending.items():
+                    self._pending.setdefault(key, value)
+                self._pending_since = self._pending_since or time.monotonic()
+            return 0
+        cutoff = timezone.now() - timedelta(seconds=settings.PRESENCE_ONLINE_SECONDS)
+        with self._lock:
+            self._last_seen = {
+                key: seen_at for key, seen_at in self._last_seen.items() if seen_at >= cutoff
+            }
+            self.flushed += len(pending)
+            self.flushes += 1
+        return len(pending)
+
+
+@retry_write
+def _write_presence(pending: dict) -> None:
+    # Sessions that logged out (possibly in another process) must not put
+    # their user back online.
+    ended = set(
+        UserSession.objects.filter(
+            session_key__in=[session_key for _user_id, session_key in pending if session_key],
+            is_active=False,
+        ).values_list("session_key", flat=True)
+    )
+    daily = {}
+    for (user_id, session_key), (seen_at, ip_address) in pending.items():
+        if session_key in ended:
+            continue
+        key = (user_id, timezone.localdate(seen_at))
+        if key not in daily or daily[key][0] < seen_at:
+            daily[key] = (seen_at, ip_address)
+    UserDailyLogin.objects.bulk_create(
+        [
+            UserDailyLogin(
+                user_id=user_id, date=day, last_seen_at=seen_at, last_ip=ip_address, online=True
+            )
+            for (user_id, day), (seen_at, ip_address) in daily.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["user", "date"],
+        update_fields=["last_seen_at", "last_ip", "online"],
+    )
+
+    sessions = [
+        (
+            connection.ops.adapt_datetimefield_value(seen_at),
+            ip_address,
+            user_id,
+            session_key,
+        )
+        for (user_id, session_key), (seen_at, ip_address) in pending.items()
+        if session_key
+    ]
+    if sessions:
+        table = connection.ops.quote_name(UserSession._meta.db_table)
+        with connection.cursor() as cursor:
+            # One prepared statement for every session, each an index lookup on session_key.
+            cursor.executemany(
+                f"UPDATE {table} SET last_seen_at = %s, ip_address = %s "
+                "WHERE user_id = %s AND session_key = %s AND is_active",
+                sessions,
+            )
+
+
+tracker = PresenceTracker()
+atexit.register(tracker.flush)
+
+
+def online_user_ids() -> set[int]:
+    """Users seen in the last ``PRESENCE_ONLINE_SECONDS``.
+
+    This process answers from memory; users served by other processes are
+    found in what those processes have flushed to ``UserDailyLogin``. A user
+    this process remembers but whose row was marked offline by a logout,
+    here or elsewhere, counts as offline.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.PRESENCE_ONLINE_SECONDS)
+    recent = tracker.recent_user_ids(cutoff)
+    online = set(recent)
+    rows = UserDailyLogin.objects.filter(date=timezone.localdate()).filter(
+        Q(online=True, last_seen_at__gte=cutoff - timedelta(seconds=settings.PRESENCE_FLUSH_SECONDS))
+        | Q(online=False, user_id__in=recent)
+    )
+    for user_id, is_online in rows.values_list("user_id", "online"):
+        if is_online:
+            online.add(user_id)
+        else:
+            online.discard(user_id)
+    return online
+
+
+def has_live_session(user_id: int) -> bool:
+    """Whether one of the user's still logged-in sessions was seen recently."""
+    cutoff = timezone.now() - timedelta(seconds=settings.PRESENCE_ONLINE_SECONDS)
+    if user_id in tracker.recent_user_ids(cutoff):
+        return True
+    return UserSession.objects.filter(
+        user_id=user_id,
+        is_active=True,
+        last_seen_at__gte=cutoff - timedelta(seconds=settings.PRESENCE_FLUSH_SECONDS),
+    ).exists()
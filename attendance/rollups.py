@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import atexit
+import calendar
+import logging
+import time
+from datetime import date, timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models.functions import TruncMonth
+
+from .dbretry import retry_write
+from .flushing import BackgroundFlusher
+from .models import (
+    AttendanceDay,
+    AttendanceRollup,
+    DepartmentRollup,
+    EmployeeRollup,
+    RollupDirtyKey,
+    User,
+)
+
+logger = logging.getLogger(__name__)
+
+
+DAY = AttendanceRollup.Periods.DAY
+MONTH = AttendanceRollup.Periods.MONTH
+
+def present_days_aggregate(condition: models.Q | None = None) -> models.Count:
+    present = models.Q(arrival_time__isnull=False)
+    return models.Count("id", filter=present & condition if condition else present)
+
+
+def verified_days_aggregate(condition: models.Q | None = None) -> models.Count:
+    verified = models.Q(verified_by__isnull=False)
+    return models.Count("id", filter=verified & condition if condition else verified)
+
+
+def worked_duration_aggregate(condition: models.Q | None = None) -> models.Sum:
+    # Mirrors hours_between: days without a departure after the arrival count as zero.
+    worked = models.Q(departure_time__gt=models.F("arrival_time"))
+    return models.Sum(
+        models.Case(
+            models.When(
+                worked & condition if condition else worked,
+                then=models.F("departure_time") - models.F("arrival_time"),
+            ),
+            output_field=models.DurationField(),
+        )
+    )
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def month_end(day: date) -> date:
+    return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+
+
+def _aggregates() -> dict:
+    return {
+        "present": present_days_aggregate(),
+        "verified": verified_days_aggregate(),
+        "worked": worked_duration_aggregate(),
+    }
+
+
+def _rollup_values(row: dict) -> dict | None:
+    if not (row["present"] or row["verified"]):
+        return None
+    return {
+        "present_days": row["present"],
+        "verified_days": row["verified"],
+        "worked_duration": row["worked"] or timedelta(0),
+    }
+
+
+def _rebuild(model, owner_field: str, source, owner_ids, days, months) -> int:
+    """Recompute the day and month buckets of ``owner_ids`` from ``source``.
+
+    ``source`` is an AttendanceDay queryset annotated with ``owner`` and
+    restricted to the owners whose buckets are being rebuilt.
+    """
+    owner_ids = set(owner_ids)
+    days = set(days)
+    months = set(months)
+    if not owner_ids or not (days or months):
+        return 0
+
+    rows = []
+    if days:
+        daily = (
+            source.filter(date__in=days)
+            .values("owner", "date")
+            .annotate(**_aggregates())
+        )
+        for row in daily:
+            values = _rollup_values(row)
+            if values:
+                rows.append(
+                    model(
+                        **{f"{owner_field}_id": row["owner"]},
+                        period=DAY,
+                        period_start=row["date"],
+                        **values,
+                    )
+                )
+    if months:
+        monthly = (
+            source.filter(date__range=(min(months), month_end(max(months))))
+            .annotate(month=TruncMonth("date"))
+            .filter(month__in=months)
+            .values("owner", "month")
+            .annotate(**_aggregates())
+        )
+        for row in monthly:
+            values = _rollup_values(row)
+            if values:
+                rows.append(
+                    model(
+                        **{f"{owner_field}_id": row["owner"]},
+                        period=MONTH,
+                        period_start=row["month"],
+                        **values,
+                    )
+                )
+
+    stale = model.objects.filter(**{f"{owner_field}_id__in": owner_ids}).filter(
+        models.Q(period=DAY, period_start__in=days)
+        | models.Q(period=MONTH, period_start__in=months)
+    )
+    with transaction.atomic():
+        stale.delete()
+        model.objects.bulk_create(rows)
+    return len(rows)
+
+
+def employee_source(user_ids, attendance=AttendanceDay):
+    return (
+        attendance.objects.filter(user_id__in=user_ids)
+        .order_by()
+        .annotate(owner=models.F("user_id"))
+    )
+
+
+def department_source(department_ids, attendance=AttendanceDay):
+    return (
+        attendance.objects.filter(
+            user__department_id__in=department_ids,
+            user__role=User.Roles.EMPLOYEE,
+            user__is_active=True,
+        )
+        .order_by()
+        .annotate(owner=models.F("user__department_id"))
+    )
+
+
+def refresh_attendance_rollups(
+    keys: Iterable[tuple[int, date]], department_ids: Iterable[int] = ()
+) -> None:
+    """Recompute every rollup bucket touched by the ``(user_id, date)`` keys.
+
+    ``department_ids`` adds departments the users no longer belong to, so a
+    move or a deactivation removes their attendance from the old totals.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    user_ids = {user_id for user_id, _day in keys}
+    days = {day for _user_id, day in keys}
+    months = {month_start(day) for day in days}
+
+    _rebuild(EmployeeRollup, "user", employee_source(user_ids), user_ids, days, months)
+
+    departments = set(department_ids)
+    departments.update(
+        User.objects.filter(
+            id__in=user_ids,
+            role=User.Roles.EMPLOYEE,
+            is_active=True,
+            department__isnull=False,
+        ).values_list("department_id", flat=True)
+    )
+    _rebuild(
+        DepartmentRollup,
+        "department",
+        department_source(departments),
+        departments,
+        days,
+        months,
+    )
+
+
+_refresh = retry_write(refresh_attendance_rollups)
+
+# Dirty keys deleted per statement once their refresh has run.
+DRAIN_DELETE_BATCH = 500
+
+
+def drain_dirty_rollups() -> int:
+    """Refresh every bucket recorded in ``RollupDirtyKey``; returns the keys drained.
+
+    Only the rows read here are deleted, so a key recorded while the refresh
+    runs stays for the next drain. Two processes draining at once only
+    recompute the same buckets twice.
+    """
+    rows = list(RollupDirtyKey.objects.values_list("id", "user_id", "day", "department_id"))
+    if not rows:
+        return 0
+    keys = {(user_id, day) for _id, user_id, day, _dep in rows if user_id is not None}
+    departments = {dep for _id, user_id, _day, dep in rows if user_id is None}
+    _refresh(keys, departments)
+    ids = [row[0] for row in rows]
+    for offset in range(0, len(ids), DRAIN_DELETE_BATCH):
+        RollupDirtyKey.objects.filter(id__in=ids[offset : offset + DRAIN_DELETE_BATCH]).delete()
+    return len(keys)
+
+
+class RollupRefresher(BackgroundFlusher):
+    """Drains the dirty rollup keys in batches off the request.
+
+    Committed changes arm a timer; a background thread drains
+    ``RollupDirtyKey`` ``ROLLUP_REFRESH_SECONDS`` later, so a burst of
+    check-ins costs one refresh. The drain also picks up keys left behind by
+    a process that died before refreshing them. A failed refresh is logged
+    and retried; it never reaches the request that changed the data.
+    """
+
+    thread_name = "rollup-refresher"
+
+    def __init__(self):
+        super().__init__()
+        self._since = None
+
+    def schedule(self) -> None:
+        with self._lock:
+            first = self._since is None
+            if first:
+                self._since = time.monotonic()
+        if first:
+            self.ensure_thread()
+            self.wake()
+
+    def next_due_in(self) -> float | None:
+        with self._lock:
+            if self._since is None:
+                return None
+            age = time.monotonic() - self._since
+        return settings.ROLLUP_REFRESH_SECONDS - age
+
+    def flush(self) -> int:
+        with self._lock:
+            self._since = None
+        try:
+            return drain_dirty_rollups()
+        except Exception:
+            logger.exception("Rollup refresh failed; the dirty keys are kept")
+            self.schedule()
+            return 0
+
+
+refresher = RollupRefresher()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    # Only processes that changed attendance touch the table on the way out.
+    if refresher.next_due_in() is not None:
+        refresher.flush()
+
+
+def flush_rollups() -> int:
+    """Refresh every dirty bucket now; returns the number of attendance days read."""
+    return refresher.flush()
+
+
+def _hand_over() -> None:
+    refresher.schedule()
+
+
+def schedule_rollup_refresh(
+    keys: Iterable[tuple[int, date]], department_ids: Iterable[int] = ()
+) -> None:
+    """Record the rollups for ``keys`` as dirty and refresh them after the commit.
+
+    The dirty keys are written in the caller's transaction, so they commit or
+    roll back with the change. Outside a transaction the change has already
+    committed and the keys follow it immediately.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+    RollupDirtyKey.objects.bulk_create(
+        [RollupDirtyKey(user_id=user_id, day=day) for user_id, day in keys]
+        + [RollupDirtyKey(department_id=department_id) for department_id in set(department_ids)],
+        batch_size=DRAIN_DELETE_BATCH,
+    )
+    if not connection.in_atomic_block:
+        _hand_over()
+        return
+    if not any(entry[1] is _hand_over for entry in connection.run_on_commit):
+        transaction.on_commit(_hand_over)
+
+
+def schedule_user_rollup_refresh(user_ids: Iterable[int], department_ids: Iterable[int] = ()) -> None:
+    """Refresh the department rollups after users change department, role or status."""
+    schedule_rollup_refresh(
+        AttendanceDay.objects.filter(user_id__in=list(user_ids))
+        .order_by()
+        .values_list("user_id", "date"),
+        department_ids,
+    )
+
+
+def rebuild_all_rollups(chunk_size: int = 500, apps=None) -> tuple[int, int]:
+    """Rebuild every rollup from raw attendance.
+
+    ``apps`` is the migration state when run from a data migration; the live
+    models are used otherwise.
+    """
+    if apps is None:
+        from django.apps import apps
+    attendance = apps.get_model("attendance", "AttendanceDay")
+    employee_rollup = apps.get_model("attendance", "EmployeeRollup")
+    department_rollup = apps.get_model("attendance", "DepartmentRollup")
+    employee_rollup.objects.all().delete()
+    department_rollup.objects.all().delete()
+
+    employee_rows = 0
+    user_ids = list(
+        attendance.objects.order_by("user_id").values_list("user_id", flat=True).distinct()
+    )
+    for offset in range(0, len(user_ids), chunk_size):
+        chunk = user_ids[offset : offset + chunk_size]
+        source = employee_source(chunk, attendance)
+        employee_rows += _rebuild_range(employee_rollup, "user", source, chunk)
+
+    department_ids = list(
+        apps.get_model("attendance", "User").objects.filter(
+            role=User.Roles.EMPLOYEE, is_active=True, department__isnull=False
+        )
+        .order_by("department_id")
+        .values_list("department_id", flat=True)
+        .distinct()
+    )
+    department_rows = _rebuild_range(
+        department_rollup,
+        "department",
+        department_source(department_ids, attendance),
+        department_ids,
+    )
+    return employee_rows, department_rows
+
+
+def _rebuild_range(model, owner_field: str, source, owner_ids) -> int:
+    days = set(source.values_list("date", flat=True).distinct())
+    months = {month_start(day) for day in days}
+    return _rebuild(model, owner_field, source, owner_ids, days, months)
@@ -1,12 +1,35 @@
 from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 
-from .models import SystemLog, UserActivity, UserDailyLogin, UserSession
+from .audit import log_activity, log_event
+from .models import (
+    AttendanceDay,
+    Department,
+    PublicHoliday,
+    SystemLog,
+    User,
+    UserDailyLogin,
+    UserSession,
+)
+from .dbretry import retry_write
+from .presence import has_live_session, tracker
+from .rollups import schedule_rollup_refresh, schedule_user_rollup_refresh
+from .snapshots import invalidate_all_snapshots, schedule_snapshot_invalidation
 from .utils import get_client_ip
+from .workcalendar import rebuild_calendar
+
+
+ROLLUP_MEMBERSHIP_FIELDS = {"department", "department_id", "is_active", "role"}
+SNAPSHOT_USER_FIELDS = {"department", "department_id", "role", "username", "first_name", "last_name"}
+TRACKED_USER_FIELDS = ROLLUP_MEMBERSHIP_FIELDS | SNAPSHOT_USER_FIELDS
+# Rollup membership first, then the names shown in snapshots.
+USER_STATE_FIELDS = ("department_id", "is_active", "role", "username", "first_name", "last_name")
 
 
 @receiver(user_logged_in)
+@retry_write
 def handle_user_logged_in(sender, request, user, **kwargs):
     request.session.save()
     session_key = request.session.session_key or ""
@@ -38,20 +61,13 @@ def handle_user_logged_in(sender, request, user, **kwargs):
     daily.online = True
     daily.save(update_fields=["first_login_at", "last_login_at", "last_seen_at", "last_ip", "online"])
 
-    SystemLog.objects.create(
-        event_type=SystemLog.EVENT_LOGIN,
+    log_event(
+        SystemLog.EVENT_LOGIN,
+        f"User {user.username} logged in",
         user=user,
         ip_address=ip_address,
-        message=f"User {user.username} logged in",
-        meta={"session_key": session_key},
-    )
-    UserActivity.objects.create(
-        user=user,
-        actor=user,
-        event_type="login",
-        message="User logged in.",
-        meta={"session_key": session_key},
     )
+    log_activity(user, user, "login", "User logged in.")
 
 
 @receiver(user_logged_out)
@@ -65,20 +81,80 @@ def handle_user_logged_out(sender, request, user, **kwargs):
             user=user, session_key=session_key, is_active=True
         ).update(is_active=False, logout_at=now)
 
-    today = timezone.localdate()
-    UserDailyLogin.objects.filter(user=user, date=today).update(online=False)
+    tracker.forget(user.id, session_key)
+    if not has_live_session(user.id):
+        today = timezone.localdate()
+        UserDailyLogin.objects.filter(user=user, date=today).update(online=False)
 
-    SystemLog.objects.create(
-        event_type=SystemLog.EVENT_LOGOUT,
+    log_event(
+        SystemLog.EVENT_LOGOUT,
+        f"User {user.username} logged out",
         user=user,
         ip_address=ip_address,
-        message=f"User {user.username} logged out",
-        meta={"session_key": session_key},
     )
-    UserActivity.objects.create(
-        user=user,
-        actor=user,
-        event_type="logout",
-        message="User logged out.",
-        meta={"session_key": session_key},
+    log_activity(user, user, "logout", "User logged out.")
+
+
+@receiver(post_save, sender=AttendanceDay)
+@receiver(post_delete, sender=AttendanceDay)
+def handle_attendance_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_rollup_refresh([(instance.user_id, instance.date)])
+    schedule_snapshot_invalidation([instance.date])
+
+
+@receiver(pre_save, sender=User)
+def remember_user_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not TRACKED_USER_FIELDS.intersection(update_fields):
+        return
+    instance._previous_state = (
+        User.objects.filter(pk=instance.pk)
+        .values_list(*USER_STATE_FIELDS)
+        .first()
     )
+
+
+@receiver(post_save, sender=User)
+def handle_user_state_changed(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_state", None)
+    if raw or created or previous is None:
+        return
+    del instance._previous_state
+    current = tuple(getattr(instance, field) for field in USER_STATE_FIELDS)
+    if previous == current:
+        return
+    if previous[:3] != current[:3]:
+        schedule_user_rollup_refresh(
+            [instance.pk],
+            {department_id for department_id in (previous[0], current[0]) if department_id},
+        )
+    # Snapshots label rows with employee and verifier names, so any rename
+    # or move stales them.
+    if previous[0] != current[0] or previous[2:] != current[2:]:
+        invalidate_all_snapshots()
+
+
+@receiver(pre_delete, sender=User)
+def handle_user_deleted(sender, instance, **kwargs):
+    if instance.department_id:
+        schedule_user_rollup_refresh([instance.pk], [instance.department_id])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def handle_snapshot_labels_changed(sender, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_all_snapshots()
+
+
+@receiver(post_save, sender=PublicHoliday)
+@receiver(post_delete, sender=PublicHoliday)
+def handle_holiday_changed(sender, raw=False, **kwargs):
+    if raw:
+        return
+    rebuild_calendar()
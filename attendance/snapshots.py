@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import zlib
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .exports import iter_week_chunks
+from .models import AttendanceDay, User, WeekSnapshot
+from .utils import get_week_start
+
+
+SNAPSHOT_VERSION = 1
+
+# Week starts whose snapshots are dropped when the current transaction commits.
+_pending = threading.local()
+
+
+def week_is_closed(week_start: date, today: date | None = None) -> bool:
+    """A week is closed once it is over and every attendance row is verified."""
+    today = today or timezone.localdate()
+    week_end = week_start + timedelta(days=6)
+    if week_end >= today:
+        return False
+    return not AttendanceDay.objects.filter(
+        date__range=(week_start, week_end),
+        user__role=User.Roles.EMPLOYEE,
+        verified_by__isnull=True,
+    ).exists()
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, (time, datetime)) else value
+
+
+def build_week_payload(week_start: date) -> dict:
+    """Serializable copy of the week as read by the exports, all employees included."""
+    employees = []
+    cells = []
+    for chunk, records in iter_week_chunks(week_start, use_snapshot=False):
+        offset = len(employees)
+        employees.extend(list(row) for row in chunk)
+        positions = {row[0]: offset + index for index, row in enumerate(chunk)}
+        for (user_id, day), record in records.items():
+            cells.append(
+                [positions[user_id], (day - week_start).days, *map(_encode, record)]
+            )
+    cells.sort()
+    return {"version": SNAPSHOT_VERSION, "employees": employees, "cells": cells}
+
+
+def freeze_week(week_start: date) -> WeekSnapshot:
+    payload = build_week_payload(week_start)
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    snapshot, _created = WeekSnapshot.objects.update_or_create(
+        week_start=week_start,
+        defaults={
+            "payload": zlib.compress(raw, 6),
+            "content_hash": hashlib.sha256(raw).hexdigest(),
+            "employee_count": len(payload["employees"]),
+            "record_count": len(payload["cells"]),
+        },
+    )
+    return snapshot
+
+
+def get_week_snapshot(week_start: date) -> WeekSnapshot | None:
+    """The stored snapshot of the week, creating it if the week has just closed."""
+    if week_start != get_week_start(week_start):
+        return None
+    snapshot = WeekSnapshot.objects.filter(week_start=week_start).first()
+    if snapshot is not None:
+        return snapshot
+    if not week_is_closed(week_start):
+        return None
+    return freeze_week(week_start)
+
+
+def load_snapshot(snapshot: WeekSnapshot) -> tuple[list[tuple], dict]:
+    """Decode a snapshot into the ``(employees, records)`` shape of the live reads."""
+    payload = json.loads(zlib.decompress(bytes(snapshot.payload)))
+    employees = [tuple(row) for row in payload["employees"]]
+    records = {}
+    for position, day_index, arrival, departure, verifier_id, first, last, verified_at in (
+        payload["cells"]
+    ):
+        day = snapshot.week_start + timedelta(days=day_index)
+        records[(employees[position][0], day)] = (
+            time.fromisoformat(arrival) if arrival else None,
+            time.fromisoformat(departure) if departure else None,
+            verifier_id,
+            first,
+            last,
+            datetime.fromisoformat(verified_at) if verified_at else None,
+        )
+    return employees, records
+
+
+def _matches(row: tuple, department_id, search: str | None) -> bool:
+    if department_id and str(row[4]) != str(department_id):
+        return False
+    if search:
+        needle = search.casefold()
+        return any(needle in (value or "").casefold() for value in row[1:4])
+    return True
+
+
+def frozen_week(
+    week_start: date, department_id=None, search=None
+) -> tuple[list[tuple], dict] | None:
+    """Snapshot rows of a closed week filtered like ``export_employees``, or ``None``."""
+    snapshot = get_week_snapshot(week_start)
+    if snapshot is None:
+        return None
+    employees, records = load_snapshot(snapshot)
+    if department_id or search:
+        employees = [row for row in employees if _matches(row, department_id, search)]
+    return employees, records
+
+
+def invalidate_week_snapshots(days: Iterable[date]) -> int:
+    week_starts = {get_week_start(day) for day in days}
+    if not week_starts:
+        return 0
+    deleted, _details = WeekSnapshot.objects.filter(week_start__in=week_starts).delete()
+    return deleted
+
+
+def invalidate_all_snapshots() -> int:
+    deleted, _details = WeekSnapshot.objects.all().delete()
+    return deleted
+
+
+def _pending_weeks() -> set:
+    if not hasattr(_pending, "week_starts"):
+        _pending.week_starts = set()
+    return _pending.week_starts
+
+
+def _invalidate_pending() -> None:
+    week_starts = set(_pending_weeks())
+    _pending.week_starts = set()
+    invalidate_week_snapshots(week_starts)
+
+
+def schedule_snapshot_invalidation(days: Iterable[date]) -> None:
+    """Drop the snapshots of the weeks of ``days`` once the transaction commits.
+
+    Only weeks that are already over can have a snapshot, so changes to the
+    current or a future week cost nothing. Inside an atomic block the weeks
+    are batched into one DELETE after commit.
+    """
+    today = timezone.localdate()
+    week_starts = _pending_weeks()
+    week_starts.update(
+        week_start
+        for week_start in {get_week_start(day) for day in days}
+        if week_start + timedelta(days=6) < today
+    )
+    if not week_starts:
+        return
+    if not connection.in_atomic_block:
+        _invalidate_pending()
+        return
+    if not any(entry[1] is _invalidate_pending for entry in connection.run_on_commit):
+        transaction.on_commit(_invalidate_pending)
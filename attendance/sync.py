@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from datetime import date, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .dbretry import retry_write
+from .models import AttendanceDay, AttendanceSyncEvent, User
+from .writes import write_day
+
+
+SYNC_BATCH_LIMIT = 100
+# Queued events older than this are refused rather than replayed.
+SYNC_MAX_AGE = timedelta(hours=18)
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+# Events of the previous day are still accepted this long after midnight.
+SYNC_MIDNIGHT_GRACE = timedelta(minutes=30)
+
+Outcomes = AttendanceSyncEvent.Outcomes
+
+
+def parse_sync_event(raw) -> dict | None:
+    """Validate one client event: ``{id, action, date, time, recorded_at}``."""
+    if not isinstance(raw, dict):
+        return None
+    event_id = raw.get("id")
+    if not isinstance(event_id, str) or not 0 < len(event_id) <= 64:
+        return None
+    if raw.get("action") not in AttendanceSyncEvent.Actions.values:
+        return None
+    try:
+        day = date.fromisoformat(raw.get("date") or "")
+        client_time = time.fromisoformat(raw.get("time") or "")
+        recorded_at = parse_datetime(raw.get("recorded_at") or "")
+    except (TypeError, ValueError):
+        return None
+    if recorded_at is None or timezone.is_naive(recorded_at):
+        return None
+    return {
+        "id": event_id,
+        "action": raw["action"],
+        "date": day,
+        "time": client_time.replace(second=0, microsecond=0),
+        "recorded_at": recorded_at,
+    }
+
+
+def raw_event_id(raw):
+    """The id a client sent with an event, echoed back even when the event is invalid."""
+    return raw.get("id") if isinstance(raw, dict) else None
+
+
+def _accepts(user: User, event: dict, now) -> bool:
+    """The event is for today by the server clock (or yesterday just after midnight).
+
+    The client's ``recorded_at`` must agree, but it only narrows what the
+    server clock allows.
+    """
+    recorded_at = event["recorded_at"]
+    local_now = timezone.localtime(now)
+    midnight = local_now.replace(hour=0, minute=0, second=0, microsecond=0)
+    allowed_days = {local_now.date()}
+    if local_now < midnight + SYNC_MIDNIGHT_GRACE:
+        allowed_days.add(local_now.date() - timedelta(days=1))
+    return (
+        event["date"] in allowed_days
+        and now - SYNC_MAX_AGE <= recorded_at <= now + SYNC_CLOCK_SKEW
+        and timezone.localdate(recorded_at) == event["date"]
+        and event["date"] >= user.start_date
+    )
+
+
+def _applied_time(event: dict, now) -> time:
+    """The client's time, never later than when the server received it."""
+    local_now = timezone.localtime(now)
+    if event["date"] != local_now.date():
+        return event["time"]
+    return min(event["time"], local_now.time().replace(second=0, microsecond=0))
+
+
+@retry_write
+def apply_sync_batch(user: User, events: list[dict]) -> tuple[list[dict], set[date]]:
+    """Apply a batch of queued check-ins/outs for ``user`` in one transaction.
+
+    Replayed ids return their stored outcome. New events are applied in the
+    order they were recorded and only ever fill empty fields, like the
+    employee form. An event that does not apply is ``superseded`` when the
+    day changed on the server (an edit or a verification) after the event
+    was recorded, else ``unchanged``. Returns the per-event results and the
+    days that changed.
+    """
+    now = timezone.now()
+    known = dict(
+        AttendanceSyncEvent.objects.filter(
+            user=user, client_event_id__in=[event["id"] for event in events]
+        ).values_list("client_event_id", "outcome")
+    )
+    fresh = sorted(
+        {event["id"]: event for event in events if event["id"] not in known}.values(),
+        key=lambda event: event["recorded_at"],
+    )
+    last_changes = dict(
+        AttendanceDay.objects.filter(
+            user=user, date__in={event["date"] for event in fresh}
+        ).values_list("date", "updated_at")
+    )
+
+    changed_days = set()
+    outcomes = {}
+    for event in fresh:
+        if not _accepts(user, event, now):
+            outcomes[event["id"]] = Outcomes.REJECTED
+            continue
+        applied_time = _applied_time(event, now)
+        if event["action"] == AttendanceSyncEvent.Actions.ARRIVE:
+            field = "arrival_time"
+            result = write_day(user.id, event["date"], arrival=applied_time)
+        else:
+            field = "departure_time"
+            result = write_day(user.id, event["date"], departure=applied_time)
+        if field in result.changed:
+            outcomes[event["id"]] = Outcomes.APPLIED
+            changed_days.add(event["date"])
+        elif field == "departure_time" and result.arrival is None:
+            outcomes[event["id"]] = Outcomes.REJECTED
+        elif last_changes.get(event["date"]) and last_changes[event["date"]] > event["recorded_at"]:
+            outcomes[event["id"]] = Outcomes.SUPERSEDED
+        else:
+            outcomes[event["id"]] = Outcomes.UNCHANGED
+
+    AttendanceSyncEvent.objects.bulk_create(
+        [
+            AttendanceSyncEvent(
+                user=user,
+                client_event_id=event["id"],
+                action=event["action"],
+                date=event["date"],
+                client_time=event["time"],
+                recorded_at=event["recorded_at"],
+                outcome=outcomes[event["id"]],
+            )
+            for event in fresh
+        ],
+        ignore_conflicts=True,
+    )
+    results = [
+        {
+            "id": event["id"],
+            "outcome": known.get(event["id"]) or outcomes[event["id"]],
+            "duplicate": event["id"] in known,
+        }
+        for event in events
+    ]
+    return results, changed_days
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from heapq import merge
+
+from django.utils.dateparse import parse_datetime
+
+from .models import User, UserActivity
+
+TIMELINE_PAGE_SIZE = 20
+
+
+def encode_cursor(row) -> str:
+    raw = f"{row.created_at.isoformat()}|{row.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """``(created_at, id)`` of the last row seen, or ``None`` for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, activity_id = raw.rsplit("|", 1)
+        created_at = parse_datetime(created_at)
+        activity_id = int(activity_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if created_at is None:
+        return None
+    return created_at, activity_id
+
+
+def keyset_filter(queryset, after):
+    """Rows strictly older than the ``(created_at, id)`` cursor ``after``."""
+    if after is None:
+        return queryset
+    created_at, activity_id = after
+    # created_at <= ? keeps the index range seek; the exclude only trims the tie.
+    return queryset.filter(created_at__lte=created_at).exclude(
+        created_at=created_at, id__gte=activity_id
+    )
+
+
+def timeline_queries(user: User, after=None) -> list:
+    """Rows about ``user`` and rows ``user`` performed on others, each newest first."""
+    return [
+        keyset_filter(queryset, after).select_related("user", "actor").order_by("-created_at", "-id")
+        for queryset in (
+            UserActivity.objects.filter(user=user),
+            UserActivity.objects.filter(actor=user).exclude(user=user),
+        )
+    ]
+
+
+def activity_page(
+    user: User, after=None, limit: int = TIMELINE_PAGE_SIZE
+) -> tuple[list[UserActivity], str | None]:
+    """One page of what happened to ``user`` and what ``user`` did, newest first.
+
+    Keyset pagination on ``(created_at, id)``: each page reads at most
+    ``limit + 1`` rows from each of the ``user`` and ``actor`` indexes, however
+    deep it is. Returns the rows and the cursor of the next page (``None`` on
+    the last one).
+    """
+    branches = [list(queryset[: limit + 1]) for queryset in timeline_queries(user, after)]
+    rows = list(merge(*branches, key=lambda item: (item.created_at, item.id), reverse=True))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
@@ -8,11 +8,42 @@ urlpatterns = [
     path("login/", views.login_view, name="login"),
     path("logout/", views.logout_view, name="logout"),
     path("profile/", views.profile_view, name="profile"),
+    path("profile/timeline/", views.activity_timeline, name="activity_timeline"),
     path("employee/", views.employee_week, name="employee_week"),
+    path("employee/sync/", views.attendance_sync, name="attendance_sync"),
+    path("kiosk/check/", views.kiosk_check, name="kiosk_check"),
     path("supervisor/", views.supervisor_verify, name="supervisor_verify"),
+    path(
+        "supervisor/pending/stream/",
+        views.supervisor_pending_stream,
+        name="supervisor_pending_stream",
+    ),
+    path(
+        "supervisor/panels/<str:panel>/",
+        views.supervisor_panel,
+        name="supervisor_panel",
+    ),
     path("admin-dashboard/", views.admin_dashboard, name="admin_dashboard"),
+    path("admin-dashboard/audit-log/", views.audit_log_metrics, name="audit_log_metrics"),
+    path("admin-dashboard/logs/", views.archived_logs, name="archived_logs"),
     path("history/", views.history, name="history"),
     path("history/week/<str:week_start>/", views.history_week, name="history_week"),
+    path("history/export/jobs/", views.export_job_create, name="export_job_create"),
+    path(
+        "history/export/jobs/<int:job_id>/",
+        views.export_job_status,
+        name="export_job_status",
+    ),
+    path(
+        "history/export/jobs/<int:job_id>/download/",
+        views.export_job_download,
+        name="export_job_download",
+    ),
+    path(
+        "history/export/range/<str:fmt>/",
+        views.history_export_range,
+        name="history_export_range",
+    ),
     path(
         "history/export/<str:week_start>/<str:fmt>/",
         views.history_export,
@@ -35,12 +35,15 @@ def date_range(start: date, end: date) -> Iterable[date]:
         current += timedelta(days=1)
 
 
-def working_days_between(start: date, end: date) -> int:
-    count = 0
-    for day in date_range(start, end):
-        if day.weekday() < 5:
-            count += 1
-    return count
+def weekdays_between(start: date, end: date) -> int:
+    """Monday-to-Friday days in ``[start, end]``, ignoring public holidays."""
+    if start > end:
+        return 0
+    full_weeks, extra_days = divmod((end - start).days + 1, 7)
+    first_weekday = start.weekday()
+    return full_weeks * 5 + sum(
+        1 for offset in range(extra_days) if (first_weekday + offset) % 7 < 5
+    )
 
 
 def get_client_ip(request) -> str:
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.utils import timezone
+
+from .dbretry import retry_write
+from .models import AttendanceDay, User, UserActivity
+
+
+def pending_attendance(day, department_id=None):
+    """Today's arrivals still waiting for a supervisor."""
+    pending = AttendanceDay.objects.filter(
+        date=day,
+        arrival_time__isnull=False,
+        verified_by__isnull=True,
+        user__role=User.Roles.EMPLOYEE,
+        user__is_active=True,
+    )
+    if department_id:
+        pending = pending.filter(user__department_id=department_id)
+    return pending
+
+
+@retry_write
+def verify_attendance(queryset, supervisor: User) -> int:
+    """Verify the unverified rows of ``queryset`` as a set.
+
+    One UPDATE marks the rows and one bulk insert logs an activity per row,
+    both inside a single transaction. The logged rows are read back by their
+    verification stamp, so rows verified concurrently by someone else are
+    never logged twice.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        verified = queryset.filter(verified_by__isnull=True).update(
+            verified_by=supervisor, verified_at=now
+        )
+        if not verified:
+            return 0
+        stamped = (
+            AttendanceDay.objects.filter(verified_by=supervisor, verified_at=now)
+            .order_by()
+            .values_list("user_id", "date")
+        )
+        UserActivity.objects.bulk_create(
+            [
+                UserActivity(
+                    user_id=user_id,
+                    actor=supervisor,
+                    event_type="verification",
+                    message="Attendance verified.",
+                    meta={"date": day.isoformat()},
+                )
+                for user_id, day in stamped
+            ]
+        )
+    return verified
@@ -1,23 +1,64 @@
 from __future__ import annotations
 
-import calendar
-import csv
-from datetime import date, timedelta
+import hashlib
+import json
+from datetime import timedelta
+from urllib.parse import urlencode
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login as auth_login
 from django.contrib.auth import logout as auth_logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, HttpResponseForbidden
-from django.shortcuts import redirect, render
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    Http404,
+    HttpResponse,
+    HttpResponseForbidden,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.middleware.gzip import GZipMiddleware
 from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.core.paginator import Paginator
-from django.db import models
-from django.utils.translation import gettext as _
-
-from openpyxl import Workbook
-
+from django.utils.translation import get_language, gettext as _
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_POST
+
+from .analytics import (
+    department_trend_charts,
+    summarize_departments,
+    summarize_employees,
+)
+from .exports import (
+    export_version,
+    iter_range_csv,
+    iter_week_csv,
+    streaming_csv_response,
+)
+from .exportjobs import (
+    EXPORT_PENDING_REFRESH_SECONDS,
+    artifact_response,
+    cached_export,
+    job_params,
+    job_stalled,
+    job_status,
+    request_export,
+    week_export_params,
+)
+from .audit import audit_metrics, log_activity, log_event
+from .kiosk import read_kiosk_token
+from .logarchive import ARCHIVE_MAX_RANGE_DAYS, ARCHIVE_PAGE_SIZE, ARCHIVED_MODELS, logs_between
+from .pendingfeed import pending_events
+from .presence import online_user_ids
+from .snapshots import get_week_snapshot
+from .timeline import TIMELINE_PAGE_SIZE, activity_page, decode_cursor
+from .sync import SYNC_BATCH_LIMIT, Outcomes, apply_sync_batch, parse_sync_event, raw_event_id
 from .forms import (
     AbsenceJustificationForm,
     DepartmentCreateForm,
@@ -25,14 +66,19 @@ from .forms import (
     LoginForm,
     ProfileImageForm,
 )
+from .justifications import (
+    filter_justifications,
+    justification_page,
+    pending_justification_count,
+)
 from .models import (
     AbsenceJustification,
     AttendanceDay,
     Department,
+    ExportJob,
     SystemLog,
     User,
     UserActivity,
-    UserDailyLogin,
 )
 from .utils import (
     WORK_START_TIME,
@@ -45,17 +91,20 @@ from .utils import (
     parse_date,
     parse_time_or_default,
     week_label,
-    working_days_between,
 )
+from .verification import pending_attendance, verify_attendance
+from .weekmatrix import build_week_matrix
+from .writes import write_day
+from .workcalendar import working_days_between
 
 
 def _log_event(request, event_type: str, message: str, meta: dict | None = None) -> None:
-    SystemLog.objects.create(
-        event_type=event_type,
+    log_event(
+        event_type,
+        message,
         user=request.user if request.user.is_authenticated else None,
         ip_address=get_client_ip(request),
-        message=message,
-        meta=meta or {},
+        meta=meta,
     )
 
 
@@ -66,149 +115,7 @@ def _log_activity(
     message: str,
     meta: dict | None = None,
 ) -> None:
-    UserActivity.objects.create(
-        user=subject_user,
-        actor=actor,
-        event_type=event_type,
-        message=message,
-        meta=meta or {},
-    )
-
-
-def _build_week_matrix(week_start_date, department_id=None, search=None, include_inactive=False):
-    week_days = get_week_days(week_start_date)
-    week_end = week_start_date + timedelta(days=6)
-    dept_qs = Department.objects.all()
-    if not include_inactive:
-        dept_qs = dept_qs.filter(is_active=True)
-    departments = list(dept_qs)
-    dept_tables = []
-    dept_map = {}
-    for dept in departments:
-        table = {"department": dept, "label": dept.name, "rows": []}
-        dept_tables.append(table)
-        dept_map[dept.id] = table
-
-    unassigned_table = {"department": None, "label": _("Unassigned"), "rows": []}
-
-    employee_qs = User.objects.filter(role=User.Roles.EMPLOYEE)
-    if not include_inactive:
-        employee_qs = employee_qs.filter(is_active=True)
-    if department_id:
-        employee_qs = employee_qs.filter(department_id=department_id)
-    if search:
-        employee_qs = employee_qs.filter(
-            models.Q(first_name__icontains=search)
-            | models.Q(last_name__icontains=search)
-            | models.Q(username__icontains=search)
-        )
-    employees = list(
-        employee_qs.select_related("department").order_by(
-            "department__name", "last_name", "first_name"
-        )
-    )
-    records = AttendanceDay.objects.filter(
-        user__in=employees, date__range=(week_start_date, week_end)
-    ).select_related("verified_by")
-    record_map = {(record.user_id, record.date): record for record in records}
-
-    for employee in employees:
-        table = dept_map.get(employee.department_id, unassigned_table)
-        row = {"employee": employee, "cells": []}
-        for day in week_days:
-            record = record_map.get((employee.id, day))
-            row["cells"].append(
-                {
-                    "date": day,
-                    "arrival": record.arrival_time if record else None,
-                    "departure": record.departure_time if record else None,
-                    "verified_by": record.verified_by if record else None,
-                    "verified_at": record.verified_at if record else None,
-                    "is_verified": bool(record and record.verified_by_id),
-                }
-            )
-        table["rows"].append(row)
-
-    if unassigned_table["rows"]:
-        dept_tables.append(unassigned_table)
-
-    return week_days, dept_tables
-
-
-def _add_months(day: date, months: int) -> date:
-    year_offset, month_index = divmod(day.month - 1 + months, 12)
-    return date(day.year + year_offset, month_index + 1, 1)
-
-
-def _build_periods(start_date: date, count: int, unit: str) -> list[dict]:
-    periods = []
-    if unit == "week":
-        for offset in range(count):
-            week_start = start_date + timedelta(days=7 * offset)
-            periods.append(
-                {
-                    "start": week_start,
-                    "end": week_start + timedelta(days=6),
-                    "label": week_start.isoformat(),
-                }
-            )
-    elif unit == "month":
-        for offset in range(count):
-            month_start = _add_months(start_date, offset)
-            last_day = calendar.monthrange(month_start.year, month_start.month)[1]
-            month_end = date(month_start.year, month_start.month, last_day)
-            periods.append(
-                {
-                    "start": month_start,
-                    "end": month_end,
-                    "label": month_start.strftime("%Y-%m"),
-                }
-            )
-    return periods
-
-
-def _build_department_trends(departments, employees, periods, today: date):
-    palette = [
-        "#6F3CFF",
-        "#9C5BFF",
-        "#F05CFF",
-        "#24B47E",
-        "#FF7A59",
-        "#1F8EFA",
-        "#F2C94C",
-        "#5E60CE",
-    ]
-    datasets = []
-    for index, dept in enumerate(departments):
-        dept_employees = [employee for employee in employees if employee.department_id == dept.id]
-        series = []
-        for period in periods:
-            period_end = min(period["end"], today)
-            expected = 0
-            for employee in dept_employees:
-                employee_start = max(period["start"], employee.start_date)
-                if employee_start <= period_end:
-                    expected += working_days_between(employee_start, period_end)
-            present = AttendanceDay.objects.filter(
-                user__in=dept_employees,
-                date__range=(period["start"], period_end),
-                arrival_time__isnull=False,
-            ).count()
-            rate = (present / expected * 100) if expected else 0
-            series.append(round(rate, 1))
-
-        color = palette[index % len(palette)]
-        datasets.append(
-            {
-                "label": dept.name,
-                "data": series,
-                "borderColor": color,
-                "backgroundColor": color,
-                "tension": 0.35,
-            }
-        )
-
-    return {"labels": [period["label"] for period in periods], "datasets": datasets}
+    log_activity(subject_user, actor, event_type, message, meta)
 
 
 def login_view(request):
@@ -234,6 +141,41 @@ def logout_view(request):
     return redirect("login")
 
 
+def _log_range(request):
+    """``start``/``end`` query dates, ordered and capped to ``ARCHIVE_MAX_RANGE_DAYS``."""
+    start = parse_date(request.GET.get("start"))
+    end = parse_date(request.GET.get("end"))
+    if not (start and end):
+        return None, None
+    if start > end:
+        start, end = end, start
+    return max(start, end - timedelta(days=ARCHIVE_MAX_RANGE_DAYS - 1)), end
+
+
+def _timeline_page(subject: User, range_start, range_end, after=None):
+    if range_start:
+        return logs_between(
+            UserActivity,
+            range_start,
+            range_end,
+            user_id=subject.id,
+            actor_id=subject.id,
+            after=after,
+            limit=TIMELINE_PAGE_SIZE,
+        )
+    return activity_page(subject, after)
+
+
+def _timeline_url(cursor: str, range_start=None, range_end=None, subject_id=None) -> str:
+    params = {"cursor": cursor}
+    if range_start:
+        params["start"] = range_start.isoformat()
+        params["end"] = range_end.isoformat()
+    if subject_id:
+        params["user"] = subject_id
+    return f"{reverse('activity_timeline')}?{urlencode(params)}"
+
+
 @login_required
 def profile_view(request):
     user = request.user
@@ -247,13 +189,79 @@ def profile_view(request):
     else:
         form = ProfileImageForm(instance=user)
 
-    activities = (
-        UserActivity.objects.filter(user=user)
-        .select_related("actor")
-        .order_by("-created_at")[:20]
+    range_start, range_end = _log_range(request)
+    activities, cursor = _timeline_page(user, range_start, range_end)
+    timeline_next = None
+    if cursor:
+        timeline_next = _timeline_url(cursor, range_start, range_end)
+
+    return render(
+        request,
+        "profile.html",
+        {
+            "form": form,
+            "activities": activities,
+            "timeline_next": timeline_next,
+            "range_start": range_start,
+            "range_end": range_end,
+        },
     )
 
-    return render(request, "profile.html", {"form": form, "activities": activities})
+
+@login_required
+def activity_timeline(request):
+    """A page of the activity timeline as JSON, keyed by an opaque ``cursor``.
+
+    Admins can read anyone's timeline with ``?user=``; supervisors only an
+    employee's.
+    """
+    viewer = request.user
+    subject = viewer
+    target_id = request.GET.get("user")
+    if target_id and str(viewer.id) != target_id:
+        if not (viewer.is_admin or viewer.is_supervisor):
+            return HttpResponseForbidden(_("Access denied."))
+        if not target_id.isdigit():
+            return JsonResponse({"error": _("Invalid request.")}, status=400)
+        subjects = User.objects.all()
+        if not viewer.is_admin:
+            subjects = subjects.filter(role=User.Roles.EMPLOYEE, is_superuser=False)
+        subject = get_object_or_404(subjects, id=target_id)
+
+    after = None
+    if request.GET.get("cursor"):
+        after = decode_cursor(request.GET["cursor"])
+        if after is None:
+            return JsonResponse({"error": _("Invalid request.")}, status=400)
+    range_start, range_end = _log_range(request)
+    activities, cursor = _timeline_page(subject, range_start, range_end, after)
+
+    next_url = None
+    if cursor:
+        next_url = _timeline_url(
+            cursor, range_start, range_end, subject.id if subject != viewer else None
+        )
+    return JsonResponse(
+        {
+            "results": [
+                {
+                    "id": activity.id,
+                    "created_at": activity.created_at,
+                    "event_type": activity.event_type,
+                    "message": activity.message,
+                    "user": activity.user_id,
+                    "actor": activity.actor_id,
+                }
+                for activity in activities
+            ],
+            "html": render_to_string(
+                "partials/timeline_items.html",
+                {"activities": activities, "subject": subject},
+                request=request,
+            ),
+            "next": next_url,
+        }
+    )
 
 
 @login_required
@@ -285,11 +293,6 @@ def employee_week(request):
     week_days = get_week_days(week_start)
     week_end = week_start + timedelta(days=6)
 
-    attendance_qs = AttendanceDay.objects.filter(
-        user=target_user, date__range=(week_start, week_end)
-    )
-    attendance_map = {record.date: record for record in attendance_qs}
-
     is_self_employee = viewer == target_user and viewer.role == User.Roles.EMPLOYEE
 
     if request.method == "POST":
@@ -304,60 +307,42 @@ def employee_week(request):
             messages.error(request, _("Only today can be submitted."))
             return redirect(f"{request.path}?week={week_start.isoformat()}")
 
-        changes = 0
-        for day in [save_day]:
-            attendance = attendance_map.get(day)
-            if not attendance:
-                attendance = AttendanceDay(user=target_user, date=day)
-
-            changed = False
-            arrive_key = f"arrive_{day.isoformat()}"
-            depart_key = f"depart_{day.isoformat()}"
-
-            if request.POST.get(arrive_key) == "on":
-                if (
-                    attendance.arrival_time is None
-                    or viewer.is_admin
-                    or viewer.is_supervisor
-                ):
-                    arrival_time = parse_time_or_default(
-                        request.POST.get(f"arrive_time_{day.isoformat()}"),
-                        WORK_START_TIME,
-                    )
-                    attendance.arrival_time = arrival_time
-                    changed = True
-                else:
-                    messages.warning(
-                        request,
-                        _(
-                            "Arrival already recorded. Ask a supervisor or admin to edit."
-                        ),
-                    )
-
-            if request.POST.get(depart_key) == "on":
-                if attendance.arrival_time is None and not (viewer.is_admin or viewer.is_supervisor):
-                    messages.error(
-                        request,
-                        _(
-                            "Departure requires an arrival time. Ask a supervisor or admin."
-                        ),
-                    )
-                elif (
-                    attendance.departure_time is None
-                    or viewer.is_admin
-                    or viewer.is_supervisor
-                ):
-                    departure_time = parse_time_or_default(
-                        request.POST.get(f"depart_time_{day.isoformat()}"),
-                        target_user.expected_end_time(),
-                    )
-                    attendance.departure_time = departure_time
-                    changed = True
-
-            if changed:
-                attendance.save()
-                attendance_map[day] = attendance
-                changes += 1
+        privileged = viewer.is_admin or viewer.is_supervisor
+        day_key = save_day.isoformat()
+        arrival = departure = None
+        if request.POST.get(f"arrive_{day_key}") == "on":
+            arrival = parse_time_or_default(
+                request.POST.get(f"arrive_time_{day_key}"), WORK_START_TIME
+            )
+        if request.POST.get(f"depart_{day_key}") == "on":
+            departure = parse_time_or_default(
+                request.POST.get(f"depart_time_{day_key}"), target_user.expected_end_time()
+            )
+        # Employees only fill empty fields; supervisors and admins may correct them.
+        result = write_day(
+            target_user.id,
+            save_day,
+            arrival,
+            departure,
+            overwrite=privileged,
+            departure_needs_arrival=not privileged,
+        )
+        if arrival is not None and "arrival_time" not in result.changed and not privileged:
+            messages.warning(
+                request,
+                _("Arrival already recorded. Ask a supervisor or admin to edit."),
+            )
+        if (
+            departure is not None
+            and not privileged
+            and "departure_time" not in result.changed
+            and result.arrival is None
+        ):
+            messages.error(
+                request,
+                _("Departure requires an arrival time. Ask a supervisor or admin."),
+            )
+        changes = 1 if result.changed else 0
 
         if changes:
             _log_event(
@@ -386,6 +371,11 @@ def employee_week(request):
             query += f"&user={target_user.id}"
         return redirect(f"{request.path}?{query}")
 
+    attendance_qs = AttendanceDay.objects.filter(
+        user=target_user, date__range=(week_start, week_end)
+    )
+    attendance_map = {record.date: record for record in attendance_qs}
+
     effective_end = min(week_end, today)
     effective_start = max(week_start, target_user.start_date)
     present_days = sum(
@@ -479,11 +469,7 @@ def supervisor_verify(request):
         return HttpResponseForbidden(_("Access denied."))
 
     today = timezone.localdate()
-    supervisor_record, _ = AttendanceDay.objects.get_or_create(user=user, date=today)
-
-    employee_form = EmployeeCreateForm()
-    department_form = DepartmentCreateForm()
-    justification_form = AbsenceJustificationForm()
+    employee_form = department_form = justification_form = None
 
     if request.method == "POST" and "create_department" in request.POST:
         department_form = DepartmentCreateForm(request.POST)
@@ -573,9 +559,7 @@ def supervisor_verify(request):
         return redirect("supervisor_verify")
 
     if request.method == "POST" and "check_in" in request.POST:
-        if supervisor_record.arrival_time is None:
-            supervisor_record.arrival_time = now_local_time()
-            supervisor_record.save(update_fields=["arrival_time"])
+        if "arrival_time" in write_day(user.id, today, arrival=now_local_time()).changed:
             _log_event(
                 request,
                 SystemLog.EVENT_ATTENDANCE,
@@ -584,35 +568,23 @@ def supervisor_verify(request):
             )
         return redirect("supervisor_verify")
 
-    if supervisor_record.arrival_time is None:
+    forms_context = {}
+    if employee_form or department_form or justification_form:
+        forms_context = {
+            "forms_inline": True,
+            **_supervisor_forms_context(employee_form, department_form, justification_form),
+        }
+
+    if not _supervisor_checked_in(user, today):
         return render(
             request,
             "supervisor_verify.html",
-            {
-                "needs_checkin": True,
-                "today": today,
-                "employee_form": employee_form,
-                "department_form": department_form,
-                "justification_form": justification_form,
-            },
+            {"needs_checkin": True, "today": today, **forms_context},
         )
 
     if request.method == "POST" and "verify_selected" in request.POST:
         ids = request.POST.getlist("verify_ids")
-        verified = 0
-        for record in AttendanceDay.objects.filter(id__in=ids, verified_by__isnull=True):
-            record.verified_by = user
-            record.verified_at = timezone.now()
-            record.save(update_fields=["verified_by", "verified_at"])
-            verified += 1
-            _log_activity(
-                record.user,
-                user,
-                "verification",
-                "Attendance verified.",
-                {"date": record.date.isoformat()},
-            )
-
+        verified = verify_attendance(AttendanceDay.objects.filter(id__in=ids), user)
         if verified:
             _log_event(
                 request,
@@ -625,10 +597,27 @@ def supervisor_verify(request):
             )
         return redirect("supervisor_verify")
 
+    if request.method == "POST" and "verify_department" in request.POST:
+        department = Department.objects.filter(id=request.POST.get("verify_department")).first()
+        verified = 0
+        if department:
+            verified = verify_attendance(pending_attendance(today, department.id), user)
+        if verified:
+            _log_event(
+                request,
+                SystemLog.EVENT_VERIFY,
+                f"Supervisor {user.username} verified {verified} employees in {department.name}",
+                {"date": today.isoformat(), "count": verified, "department": department.id},
+            )
+            messages.success(
+                request, _("Verified %(count)s employees.") % {"count": verified}
+            )
+        else:
+            messages.info(request, _("No pending employees in this department."))
+        return redirect("supervisor_verify")
+
     if request.method == "POST" and "depart_self" in request.POST:
-        if supervisor_record.departure_time is None:
-            supervisor_record.departure_time = now_local_time()
-            supervisor_record.save(update_fields=["departure_time"])
+        if "departure_time" in write_day(user.id, today, departure=now_local_time()).changed:
             _log_event(
                 request,
                 SystemLog.EVENT_ATTENDANCE,
@@ -637,76 +626,254 @@ def supervisor_verify(request):
             )
         return redirect("supervisor_verify")
 
-    pending_qs = AttendanceDay.objects.filter(
-        date=today,
-        arrival_time__isnull=False,
-        verified_by__isnull=True,
-        user__role=User.Roles.EMPLOYEE,
-        user__is_active=True,
-    ).select_related("user", "user__department")
+    context = {
+        "needs_checkin": False,
+        "today": today,
+        **_supervisor_pending_context(request, today),
+        **forms_context,
+    }
+    return render(request, "supervisor_verify.html", context)
 
-    employees = (
-        User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True)
-        .select_related("department")
-        .order_by("department__name", "last_name", "first_name")
-    )
 
+def _supervisor_checked_in(user: User, day) -> bool:
+    return AttendanceDay.objects.filter(user=user, date=day, arrival_time__isnull=False).exists()
+
+
+def _supervisor_pending_context(request, today) -> dict:
+    # Taken before the read so the live feed replays anything saved meanwhile.
+    rendered_at = timezone.now()
+    pending = list(pending_attendance(today).select_related("user", "user__department"))
+    counts = {}
+    for record in pending:
+        department = record.user.department
+        if department:
+            counts.setdefault(department.id, {"department": department, "count": 0})["count"] += 1
+    return {
+        "pending_attendance": pending,
+        "pending_since": rendered_at.isoformat(),
+        "pending_departments": sorted(counts.values(), key=lambda row: row["department"].name),
+    }
+
+
+def _supervisor_charts_context(request, today) -> dict:
+    employees = User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True)
+    departments = Department.objects.filter(is_active=True)
+    weekly_chart, monthly_chart = department_trend_charts(departments, employees, today)
+    return {"weekly_chart": weekly_chart, "monthly_chart": monthly_chart}
+
+
+def _supervisor_justifications_context(request, today) -> dict:
     just_status = request.GET.get("just_status") or ""
     just_search = request.GET.get("just_search") or ""
     just_start = parse_date(request.GET.get("just_start"))
     just_end = parse_date(request.GET.get("just_end"))
 
-    justifications = AbsenceJustification.objects.select_related(
-        "user", "created_by", "approved_by"
+    justifications, just_previous, just_next = justification_page(
+        filter_justifications(just_status, just_search, just_start, just_end).select_related(
+            "user", "created_by", "approved_by"
+        ),
+        after=request.GET.get("just_after"),
+        before=request.GET.get("just_before"),
     )
-    if just_status:
-        justifications = justifications.filter(status=just_status)
-    if just_search:
-        justifications = justifications.filter(
-            models.Q(user__first_name__icontains=just_search)
-            | models.Q(user__last_name__icontains=just_search)
-            | models.Q(user__username__icontains=just_search)
-            | models.Q(other_reason__icontains=just_search)
-        )
-    if just_start:
-        justifications = justifications.filter(end_date__gte=just_start)
-    if just_end:
-        justifications = justifications.filter(start_date__lte=just_end)
-
-    departments = Department.objects.filter(is_active=True)
-    all_departments = Department.objects.all().order_by("name")
-    week_count = 8
-    monthly_count = 6
-    weekly_start = get_week_start(today) - timedelta(days=7 * (week_count - 1))
-    monthly_start = _add_months(date(today.year, today.month, 1), -(monthly_count - 1))
-    weekly_periods = _build_periods(weekly_start, week_count, "week")
-    monthly_periods = _build_periods(monthly_start, monthly_count, "month")
-    weekly_chart = _build_department_trends(
-        departments, list(employees), weekly_periods, today
+    just_filters = urlencode(
+        {
+            "just_status": just_status,
+            "just_search": just_search,
+            "just_start": just_start.isoformat() if just_start else "",
+            "just_end": just_end.isoformat() if just_end else "",
+        }
     )
-    monthly_chart = _build_department_trends(
-        departments, list(employees), monthly_periods, today
-    )
-
-    context = {
-        "needs_checkin": False,
-        "today": today,
-        "pending_attendance": pending_qs,
-        "supervisor_record": supervisor_record,
-        "employees": employees,
-        "current_week_start": get_week_start(today),
-        "employee_form": employee_form,
-        "department_form": department_form,
-        "justification_form": justification_form,
+    return {
         "justifications": justifications,
+        "just_previous": just_previous,
+        "just_next": just_next,
+        "just_filters": just_filters,
+        "pending_justifications": pending_justification_count(),
         "just_status": just_status,
         "just_search": just_search,
         "just_start": just_start.isoformat() if just_start else "",
         "just_end": just_end.isoformat() if just_end else "",
-        "weekly_chart": weekly_chart,
-        "monthly_chart": monthly_chart,
     }
-    return render(request, "supervisor_verify.html", context)
+
+
+def _supervisor_directory_context(request, today) -> dict:
+    employees = (
+        User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True)
+        .select_related("department")
+        .order_by("department__name", "last_name", "first_name")
+    )
+    return {"employees": employees, "current_week_start": get_week_start(today)}
+
+
+def _supervisor_forms_context(
+    employee_form=None, department_form=None, justification_form=None
+) -> dict:
+    return {
+        "employee_form": employee_form or EmployeeCreateForm(),
+        "department_form": department_form or DepartmentCreateForm(),
+        "justification_form": justification_form or AbsenceJustificationForm(),
+    }
+
+
+SUPERVISOR_PANELS = {
+    "pending": _supervisor_pending_context,
+    "charts": _supervisor_charts_context,
+    "justifications": _supervisor_justifications_context,
+    "directory": _supervisor_directory_context,
+    "forms": lambda request, today: _supervisor_forms_context(),
+}
+
+
+@login_required
+def supervisor_panel(request, panel: str):
+    """One lazily fetched section of the supervisor page, as an HTML fragment."""
+    user = request.user
+    if not (user.is_admin or user.is_supervisor):
+        return HttpResponseForbidden(_("Access denied."))
+    if panel not in SUPERVISOR_PANELS:
+        raise Http404
+
+    today = timezone.localdate()
+    if panel != "forms" and not _supervisor_checked_in(user, today):
+        return HttpResponseForbidden(_("Check-in to access the verification panel."))
+    context = {"today": today, **SUPERVISOR_PANELS[panel](request, today)}
+    return render(request, f"partials/supervisor_{panel}.html", context)
+
+
+@login_required
+async def supervisor_pending_stream(request):
+    """Server-Sent Events feed of today's pending queue.
+
+    Only served under ASGI; a WSGI worker answers 204, which tells
+    EventSource to stop reconnecting and leaves the page as it was.
+    """
+    user = await request.auser()
+    if not (user.is_admin or user.is_supervisor):
+        return HttpResponseForbidden(_("Access denied."))
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    # Checked here: once the stream has started, an error can no longer be a 400.
+    department_id = request.GET.get("department") or None
+    if department_id and not department_id.isdecimal():
+        return HttpResponse(_("Invalid request."), status=400)
+
+    response = StreamingHttpResponse(
+        pending_events(
+            request.headers.get("Last-Event-ID") or request.GET.get("since"),
+            int(department_id) if department_id else None,
+        ),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@login_required
+@require_POST
+def attendance_sync(request):
+    """Apply a batch of check-ins/outs queued by the browser while offline.
+
+    The body is ``{"events": [...]}`` with at most ``SYNC_BATCH_LIMIT``
+    events; replaying a batch is safe because events are deduplicated by id.
+    Results come back per event, in request order.
+    """
+    user = request.user
+    if user.role != User.Roles.EMPLOYEE:
+        return HttpResponseForbidden(_("Access denied."))
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        payload = None
+    raw_events = payload.get("events") if isinstance(payload, dict) else None
+    if not isinstance(raw_events, list) or not 0 < len(raw_events) <= SYNC_BATCH_LIMIT:
+        return JsonResponse({"error": _("Invalid request.")}, status=400)
+    events = [parse_sync_event(raw) for raw in raw_events]
+    valid = [event for event in events if event]
+    applied, changed_days = apply_sync_batch(user, valid) if valid else ([], set())
+    # Malformed events are rejected on their own; the rest of the batch still applies.
+    applied = iter(applied)
+    results = []
+    for raw, event in zip(raw_events, events):
+        if event:
+            results.append(next(applied))
+        else:
+            results.append(
+                {
+                    "id": raw_event_id(raw),
+                    "outcome": Outcomes.REJECTED,
+                    "duplicate": False,
+                    "invalid": True,
+                }
+            )
+    for day in sorted(changed_days):
+        _log_event(
+            request,
+            SystemLog.EVENT_ATTENDANCE,
+            f"Attendance synced by {user.username}",
+            {"employee": user.username, "day": day.isoformat()},
+        )
+        _log_activity(
+            user,
+            user,
+            "attendance",
+            f"Attendance updated for {day.isoformat()}",
+            {"day": day.isoformat(), "source": "sync"},
+        )
+    if changed_days:
+        messages.success(request, _("Attendance saved."))
+    rejected = sum(
+        result["outcome"] == Outcomes.REJECTED and not result["duplicate"] for result in results
+    )
+    if rejected:
+        messages.warning(request, _("Offline check-ins not saved: %(count)d.") % {"count": rejected})
+    return JsonResponse({"results": results})
+
+
+@csrf_exempt
+@require_POST
+def kiosk_check(request):
+    """JSON check-in/check-out for a lobby kiosk or badge reader.
+
+    The body is ``{"token": ..., "action": "in" | "out"}``; the token is a
+    signed badge token, so no session or user lookup is needed.
+    """
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict) or payload.get("action") not in ("in", "out"):
+        return JsonResponse({"error": _("Invalid request.")}, status=400)
+    user_id = read_kiosk_token(payload.get("token"))
+    if user_id is None:
+        return JsonResponse({"error": _("Invalid or expired token.")}, status=403)
+
+    today = timezone.localdate()
+    if payload["action"] == "in":
+        result = write_day(user_id, today, arrival=now_local_time(), active_only=True)
+        if result.arrival is None:
+            return JsonResponse({"error": _("This badge is not active.")}, status=403)
+        recorded = "arrival_time" in result.changed
+        return JsonResponse(
+            {
+                "status": "checked_in" if recorded else "already_checked_in",
+                "date": today.isoformat(),
+                "arrival": result.arrival.strftime("%H:%M"),
+                "departure": result.departure.strftime("%H:%M") if result.departure else None,
+            },
+            status=201 if recorded else 200,
+        )
+
+    result = write_day(user_id, today, departure=now_local_time(), active_only=True)
+    if "departure_time" not in result.changed:
+        return JsonResponse({"error": _("No open check-in for today.")}, status=409)
+    return JsonResponse(
+        {
+            "status": "checked_out",
+            "date": today.isoformat(),
+            "departure": result.departure.strftime("%H:%M"),
+        }
+    )
 
 
 @login_required
@@ -751,117 +918,47 @@ def admin_dashboard(request):
         return redirect(f"{request.path}?start={start_date.isoformat()}&end={end_date.isoformat()}")
 
     departments = Department.objects.filter(is_active=True)
+    all_departments = Department.objects.all().order_by("name")
     employees = User.objects.filter(role=User.Roles.EMPLOYEE, is_active=True)
     inactive_employees = User.objects.filter(
         role=User.Roles.EMPLOYEE, is_active=False
     ).order_by("last_name", "first_name")
-    effective_end = min(end_date, today)
-
-    dept_rows = []
-    for dept in departments:
-        dept_employees = list(employees.filter(department=dept))
-        expected = 0
-        for employee in dept_employees:
-            employee_start = max(start_date, employee.start_date)
-            if employee_start <= effective_end:
-                expected += working_days_between(employee_start, effective_end)
-        present = AttendanceDay.objects.filter(
-            user__in=dept_employees,
-            date__range=(start_date, effective_end),
-            arrival_time__isnull=False,
-        ).count()
-        rate = (present / expected * 100) if expected else 0
-        dept_rows.append(
-            {
-                "department": dept,
-                "expected": expected,
-                "present": present,
-                "rate": rate,
-            }
-        )
 
-    daily_logins = {
-        record.user_id: record.online
-        for record in UserDailyLogin.objects.filter(date=today)
-    }
+    summaries = summarize_employees(
+        employees.select_related("department"), start_date, end_date, today
+    )
+    dept_rows = summarize_departments(departments, summaries)
+
+    online_ids = online_user_ids()
 
     employee_rows = []
     employee_cards = []
-    for employee in employees.select_related("department"):
-        employee_start = max(start_date, employee.start_date)
-        records = list(
-            AttendanceDay.objects.filter(
-                user=employee, date__range=(employee_start, effective_end)
-            )
-        )
-        present_days = sum(1 for record in records if record.arrival_time is not None)
-        present_hours = sum(
-            hours_between(record.arrival_time, record.departure_time)
-            for record in records
-            if record.arrival_time and record.departure_time
-        )
-        employee_expected_days = (
-            working_days_between(employee_start, effective_end)
-            if employee_start <= effective_end
-            else 0
-        )
-        expected_hours = expected_daily_hours(employee.is_intern) * employee_expected_days
-        absent_hours = max(expected_hours - present_hours, 0)
-        absent_days = max(employee_expected_days - present_days, 0)
+    for summary in summaries:
+        employee = summary["employee"]
+        period = summary["range"]
+        total = summary["total"]
         employee_rows.append(
             {
                 "employee": employee,
                 "department": employee.department,
-                "present_days": present_days,
-                "absent_days": absent_days,
-                "present_hours": present_hours,
-                "absent_hours": absent_hours,
+                "present_days": period["present_days"],
+                "absent_days": period["absent_days"],
+                "present_hours": period["present_hours"],
+                "absent_hours": period["absent_hours"],
             }
         )
-
-        total_start = employee.start_date
-        total_end = today
-        total_working_days = (
-            working_days_between(total_start, total_end)
-            if total_start <= total_end
-            else 0
-        )
-        total_records = list(
-            AttendanceDay.objects.filter(
-                user=employee, date__range=(total_start, total_end)
-            )
-        )
-        total_present_days = sum(
-            1 for record in total_records if record.arrival_time is not None
-        )
-        total_present_hours = sum(
-            hours_between(record.arrival_time, record.departure_time)
-            for record in total_records
-            if record.arrival_time and record.departure_time
-        )
-        total_expected_hours = expected_daily_hours(employee.is_intern) * total_working_days
-        total_absent_hours = max(total_expected_hours - total_present_hours, 0)
-        total_absent_days = max(total_working_days - total_present_days, 0)
-
         employee_cards.append(
             {
                 "employee": employee,
                 "start_date": employee.start_date,
-                "status": _("Online") if daily_logins.get(employee.id) else _("Offline"),
-                "present_hours": total_present_hours,
-                "absent_hours": total_absent_hours,
-                "absent_days": total_absent_days,
+                "status": _("Online") if employee.id in online_ids else _("Offline"),
+                "present_hours": total["present_hours"],
+                "absent_hours": total["absent_hours"],
+                "absent_days": total["absent_days"],
             }
         )
 
-    week_count = 8
-    monthly_count = 6
-    weekly_start = get_week_start(today) - timedelta(days=7 * (week_count - 1))
-    monthly_start = _add_months(date(today.year, today.month, 1), -(monthly_count - 1))
-    weekly_periods = _build_periods(weekly_start, week_count, "week")
-    monthly_periods = _build_periods(monthly_start, monthly_count, "month")
-    weekly_chart = _build_department_trends(departments, list(employees), weekly_periods, today)
-    monthly_chart = _build_department_trends(departments, list(employees), monthly_periods, today)
+    weekly_chart, monthly_chart = department_trend_charts(departments, employees, today)
 
     context = {
         "start_date": start_date,
@@ -878,6 +975,48 @@ def admin_dashboard(request):
     return render(request, "admin_dashboard.html", context)
 
 
+@login_required
+def audit_log_metrics(request):
+    if not request.user.is_admin:
+        return HttpResponseForbidden(_("Access denied."))
+    return JsonResponse(audit_metrics())
+
+
+@login_required
+def archived_logs(request):
+    if not request.user.is_admin:
+        return HttpResponseForbidden(_("Access denied."))
+    model = ARCHIVED_MODELS.get(request.GET.get("log", "system"))
+    start, end = _log_range(request)
+    if model is None or start is None:
+        return JsonResponse({"error": _("Invalid request.")}, status=400)
+    after = None
+    if request.GET.get("cursor"):
+        after = decode_cursor(request.GET["cursor"])
+        if after is None:
+            return JsonResponse({"error": _("Invalid request.")}, status=400)
+    user_id = request.GET.get("user")
+    rows, cursor = logs_between(
+        model,
+        start,
+        end,
+        user_id=int(user_id) if user_id and user_id.isdigit() else None,
+        event_type=request.GET.get("event_type") or None,
+        after=after,
+        limit=ARCHIVE_PAGE_SIZE,
+    )
+    next_url = None
+    if cursor:
+        next_url = f"{request.path}?{urlencode({**request.GET.dict(), 'cursor': cursor})}"
+    fields = [field.attname for field in model._meta.concrete_fields]
+    return JsonResponse(
+        {
+            "results": [{name: getattr(row, name) for name in fields} for row in rows],
+            "next": next_url,
+        }
+    )
+
+
 @login_required
 def history(request):
     user = request.user
@@ -909,11 +1048,86 @@ def history(request):
         "start_date": start_date,
         "end_date": end_date,
         "page": page,
+        "departments": Department.objects.all(),
     }
     return render(request, "history.html", context)
 
 
+def _week_version(request, week_start: str, fmt: str | None = None):
+    """``(etag, last_modified, data version)`` of a history week page or export.
+
+    Closed weeks use their snapshot hash; open weeks hash the exported
+    employees with aggregates of the week's attendance. The page variant also
+    covers the viewer, language and CSRF cookie so a 304 never replays
+    another session's markup. Cached on the request for the view to reuse.
+    """
+    key = (week_start, fmt)
+    cache = request.__dict__.setdefault("_week_versions", {})
+    if key in cache:
+        return cache[key]
+
+    user = request.user
+    week_start_date = parse_date(week_start)
+    if not (user.is_admin or user.is_supervisor) or not week_start_date:
+        cache[key] = (None, None, None)
+        return cache[key]
+
+    department_id = request.GET.get("department") or None
+    search = request.GET.get("search") or None
+    snapshot = get_week_snapshot(week_start_date)
+    if fmt is None and snapshot is not None:
+        version, last_modified = snapshot.content_hash, snapshot.created_at
+    else:
+        version, last_modified = export_version(
+            week_start_date,
+            week_start_date + timedelta(days=6),
+            department_id=None if fmt else department_id,
+            search=None if fmt else search,
+        )
+    parts = [version, fmt or "html", department_id, search, get_language()]
+    if fmt is None:
+        parts += [
+            list(Department.objects.values_list("id", "name", "is_active")),
+            user.pk,
+            user.get_full_name(),
+            user.username,
+            str(user.profile_image),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        ]
+    etag = hashlib.sha256(repr(parts).encode()).hexdigest()
+    cache[key] = (etag, last_modified, version)
+    return cache[key]
+
+
+_gzip = GZipMiddleware(lambda request: None)
+
+
+def _week_etag(request, week_start: str, fmt: str | None = None):
+    # Weak: the same content may be sent gzipped or not.
+    etag = _week_version(request, week_start, fmt)[0]
+    return f'W/"{etag}"' if etag else None
+
+
+def _week_last_modified(request, week_start: str, fmt: str | None = None):
+    return _week_version(request, week_start, fmt)[1]
+
+
+def _revalidate(response):
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Cookie", "Accept-Language"))
+    return response
+
+
+def _export_response(request, response):
+    # XLSX files are already zip-compressed; only text exports are worth gzipping.
+    if response.get("Content-Type", "").startswith("text/"):
+        response = _gzip.process_response(request, response)
+    return _revalidate(response)
+
+
 @login_required
+@gzip_page
+@condition(etag_func=_week_etag, last_modified_func=_week_last_modified)
 def history_week(request, week_start: str):
     user = request.user
     if not (user.is_admin or user.is_supervisor):
@@ -925,7 +1139,7 @@ def history_week(request, week_start: str):
 
     department_id = request.GET.get("department")
     search = request.GET.get("search")
-    week_days, dept_tables = _build_week_matrix(
+    week_days, dept_tables = build_week_matrix(
         week_start_date,
         department_id=department_id,
         search=search,
@@ -941,10 +1155,43 @@ def history_week(request, week_start: str):
         "search": search or "",
         "selected_department": department_id or "",
     }
-    return render(request, "history_week.html", context)
+    return _revalidate(render(request, "history_week.html", context))
+
+
+def _export_pending(request, job):
+    """Serve a finished job, or a status page for one that is queued, stalled or failed.
+
+    Only a job that is making progress reloads itself; a failed one shows its
+    error and is queued again through the page's ``?retry=1`` link.
+    """
+    if job.status == ExportJob.Status.DONE:
+        return artifact_response(job)
+    query = request.GET.copy()
+    query.pop("retry", None)
+    page_url = f"{request.path}?{query.urlencode()}" if query else request.path
+    query["retry"] = "1"
+    stalled = job_stalled(job)
+    failed = job.status == ExportJob.Status.FAILED
+    response = render(
+        request,
+        "export_pending.html",
+        {
+            "job": job,
+            "failed": failed,
+            "stalled": stalled,
+            "page_url": page_url,
+            "retry_url": f"{request.path}?{query.urlencode()}",
+        },
+        status=200 if failed else 202,
+    )
+    if not (failed or stalled):
+        response["Refresh"] = f"{EXPORT_PENDING_REFRESH_SECONDS}; url={page_url}"
+    patch_cache_control(response, no_store=True)
+    return response
 
 
 @login_required
+@condition(etag_func=_week_etag, last_modified_func=_week_last_modified)
 def history_export(request, week_start: str, fmt: str):
     user = request.user
     if not (user.is_admin or user.is_supervisor):
@@ -954,114 +1201,180 @@ def history_export(request, week_start: str, fmt: str):
     if not week_start_date:
         return HttpResponse(_("Invalid week start."), status=400)
 
-    week_days, dept_tables = _build_week_matrix(
-        week_start_date, include_inactive=True
-    )
+    params = week_export_params(week_start_date)
+    fingerprint = _week_version(request, week_start, fmt)[2]
+    cached = cached_export(ExportJob.Kinds.WEEK, fmt, params, fingerprint)
+    if cached:
+        _log_event(
+            request,
+            SystemLog.EVENT_EXPORT,
+            f"Weekly {fmt.upper()} served from cache to {user.username}",
+            {"week_start": week_start_date.isoformat(), "job": cached.id},
+        )
+        return _export_response(request, artifact_response(cached))
 
     if fmt == "csv":
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            f'attachment; filename="attendance_{week_start_date.isoformat()}.csv"'
+        response = streaming_csv_response(
+            iter_week_csv(week_start_date, include_inactive=True),
+            f"attendance_{week_start_date.isoformat()}.csv",
         )
-        writer = csv.writer(response)
-        header = ["Department", "Employee"]
-        for day in week_days:
-            label = day.isoformat()
-            header.extend(
-                [
-                    f"{label} Arrival",
-                    f"{label} Departure",
-                    f"{label} Verified By",
-                    f"{label} Verified At",
-                ]
-            )
-        writer.writerow(header)
-        for table in dept_tables:
-            for row in table["rows"]:
-                values = [
-                    table["label"],
-                    row["employee"].get_full_name() or row["employee"].username,
-                ]
-                for cell in row["cells"]:
-                    values.extend(
-                        [
-                            cell["arrival"].strftime("%H:%M") if cell["arrival"] else "",
-                            cell["departure"].strftime("%H:%M")
-                            if cell["departure"]
-                            else "",
-                            cell["verified_by"].get_full_name()
-                            if cell["verified_by"]
-                            else "",
-                            cell["verified_at"].strftime("%Y-%m-%d %H:%M")
-                            if cell["verified_at"]
-                            else "",
-                        ]
-                    )
-                writer.writerow(values)
-
         _log_event(
             request,
             SystemLog.EVENT_EXPORT,
             f"Weekly CSV exported by {user.username}",
             {"week_start": week_start_date.isoformat()},
         )
-        return response
+        return _export_response(request, response)
 
     if fmt == "xlsx":
-        workbook = Workbook()
-        default_sheet = workbook.active
-        workbook.remove(default_sheet)
-
-        header = ["Employee"]
-        for day in week_days:
-            label = day.isoformat()
-            header.extend(
-                [
-                    f"{label} Arrival",
-                    f"{label} Departure",
-                    f"{label} Verified By",
-                    f"{label} Verified At",
-                ]
-            )
-        for table in dept_tables:
-            sheet_name = table["label"][:31]
-            sheet = workbook.create_sheet(title=sheet_name)
-            sheet.append(header)
-            for row in table["rows"]:
-                values = [row["employee"].get_full_name() or row["employee"].username]
-                for cell in row["cells"]:
-                    values.extend(
-                        [
-                            cell["arrival"].strftime("%H:%M")
-                            if cell["arrival"]
-                            else "",
-                            cell["departure"].strftime("%H:%M")
-                            if cell["departure"]
-                            else "",
-                            cell["verified_by"].get_full_name()
-                            if cell["verified_by"]
-                            else "",
-                            cell["verified_at"].strftime("%Y-%m-%d %H:%M")
-                            if cell["verified_at"]
-                            else "",
-                        ]
-                    )
-                sheet.append(values)
-
-        response = HttpResponse(
-            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        requested_at = timezone.now()
+        job = request_export(
+            ExportJob.Kinds.WEEK,
+            fmt,
+            params,
+            user,
+            fingerprint,
+            retry=request.GET.get("retry") == "1",
         )
-        response[
-            "Content-Disposition"
-        ] = f'attachment; filename="attendance_{week_start_date.isoformat()}.xlsx"'
-        workbook.save(response)
+        if job.created_at >= requested_at:
+            _log_event(
+                request,
+                SystemLog.EVENT_EXPORT,
+                f"Export job {job.id} requested by {user.username}",
+                {"week_start": week_start_date.isoformat(), "job": job.id},
+            )
+        return _export_response(request, _export_pending(request, job))
+
+    return HttpResponse(_("Format not supported."), status=400)
+
 
+@login_required
+def history_export_range(request, fmt: str):
+    user = request.user
+    if not (user.is_admin or user.is_supervisor):
+        return HttpResponseForbidden(_("Access denied."))
+
+    start_date = parse_date(request.GET.get("start"))
+    end_date = parse_date(request.GET.get("end"))
+    if not start_date or not end_date:
+        return HttpResponse(_("Invalid date range."), status=400)
+    if start_date > end_date:
+        start_date, end_date = end_date, start_date
+
+    filters = {
+        "department_id": request.GET.get("department") or None,
+        "search": request.GET.get("search") or None,
+        "include_inactive": True,
+    }
+    filename = f"attendance_{start_date.isoformat()}_{end_date.isoformat()}"
+    meta = {
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "department": filters["department_id"] or "",
+        "search": filters["search"] or "",
+    }
+
+    if fmt == "csv":
+        response = streaming_csv_response(
+            iter_range_csv(start_date, end_date, **filters), f"{filename}.csv"
+        )
         _log_event(
             request,
             SystemLog.EVENT_EXPORT,
-            f"Weekly XLSX exported by {user.username}",
-            {"week_start": week_start_date.isoformat()},
+            f"Range CSV exported by {user.username}",
+            meta,
         )
         return response
 
+    if fmt == "xlsx":
+        params = job_params(start_date, end_date, filters["department_id"], filters["search"])
+        requested_at = timezone.now()
+        job = request_export(
+            ExportJob.Kinds.RANGE, fmt, params, user, retry=request.GET.get("retry") == "1"
+        )
+        if job.created_at >= requested_at:
+            _log_event(
+                request,
+                SystemLog.EVENT_EXPORT,
+                f"Export job {job.id} requested by {user.username}",
+                {**meta, "job": job.id},
+            )
+        elif job.status == ExportJob.Status.DONE:
+            _log_event(
+                request,
+                SystemLog.EVENT_EXPORT,
+                f"Range XLSX served from cache to {user.username}",
+                {**meta, "job": job.id},
+            )
+        return _export_pending(request, job)
+
     return HttpResponse(_("Format not supported."), status=400)
+
+
+@login_required
+def export_job_create(request):
+    user = request.user
+    if not (user.is_admin or user.is_supervisor):
+        return HttpResponseForbidden(_("Access denied."))
+    if request.method != "POST":
+        return HttpResponse(status=405)
+
+    kind = request.POST.get("kind", ExportJob.Kinds.WEEK)
+    fmt = request.POST.get("fmt")
+    if kind not in ExportJob.Kinds.values or fmt not in ExportJob.Formats.values:
+        return HttpResponse(_("Format not supported."), status=400)
+
+    start_date = parse_date(request.POST.get("start"))
+    if kind == ExportJob.Kinds.WEEK:
+        if not start_date:
+            return HttpResponse(_("Invalid week start."), status=400)
+        params = week_export_params(get_week_start(start_date))
+    else:
+        end_date = parse_date(request.POST.get("end"))
+        if not start_date or not end_date:
+            return HttpResponse(_("Invalid date range."), status=400)
+        if start_date > end_date:
+            start_date, end_date = end_date, start_date
+        params = job_params(
+            start_date,
+            end_date,
+            request.POST.get("department") or None,
+            request.POST.get("search") or None,
+        )
+
+    # The button is an explicit request, so a failed job is queued again.
+    job = request_export(kind, fmt, params, user, retry=True)
+    _log_event(
+        request,
+        SystemLog.EVENT_EXPORT,
+        f"Export job {job.id} requested by {user.username}",
+        {**params, "fmt": fmt, "job": job.id},
+    )
+    status = 200 if job.status == ExportJob.Status.DONE else 202
+    return JsonResponse(job_status(job), status=status)
+
+
+@login_required
+def export_job_status(request, job_id: int):
+    user = request.user
+    if not (user.is_admin or user.is_supervisor):
+        return HttpResponseForbidden(_("Access denied."))
+    job = get_object_or_404(ExportJob, id=job_id)
+    return JsonResponse(job_status(job))
+
+
+@login_required
+def export_job_download(request, job_id: int):
+    user = request.user
+    if not (user.is_admin or user.is_supervisor):
+        return HttpResponseForbidden(_("Access denied."))
+    job = get_object_or_404(ExportJob, id=job_id, status=ExportJob.Status.DONE)
+    if not job.artifact or not job.artifact.storage.exists(job.artifact.name):
+        raise Http404
+    _log_event(
+        request,
+        SystemLog.EVENT_EXPORT,
+        f"Export job {job.id} downloaded by {user.username}",
+        {**job.params, "fmt": job.fmt, "job": job.id},
+    )
+    return artifact_response(job)
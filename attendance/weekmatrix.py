@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Iterable
+
+from django.utils.translation import gettext as _
+
+from .exports import iter_week_chunks
+from .models import Department
+from .utils import get_week_days
+
+
+class WeekCell:
+    """One employee day, reading straight from the attendance tuple.
+
+    ``record`` is the ``RECORD_FIELDS`` tuple of the day or ``None``; days
+    without attendance share one empty cell per weekday across all rows.
+    """
+
+    __slots__ = ("date", "record")
+
+    def __init__(self, day: date, record: tuple | None = None):
+        self.date = day
+        self.record = record
+
+    @property
+    def arrival(self):
+        return self.record[0] if self.record else None
+
+    @property
+    def departure(self):
+        return self.record[1] if self.record else None
+
+    @property
+    def is_verified(self) -> bool:
+        return bool(self.record and self.record[2])
+
+    @property
+    def verified_by(self) -> str:
+        if not self.record:
+            return ""
+        return f"{self.record[3] or ''} {self.record[4] or ''}".strip()
+
+    @property
+    def verified_at(self):
+        return self.record[5] if self.record else None
+
+
+class WeekRow:
+    __slots__ = ("user_id", "name", "cells")
+
+    def __init__(self, user_id: int, name: str, cells: tuple[WeekCell, ...]):
+        self.user_id = user_id
+        self.name = name
+        self.cells = cells
+
+
+def fill_week_tables(
+    chunks: Iterable[tuple[list[tuple], dict]], week_days, dept_map: dict, unassigned: dict
+) -> None:
+    """Append a ``WeekRow`` per employee of ``chunks`` to its department table."""
+    empty_cells = [WeekCell(day) for day in week_days]
+    for employees, records in chunks:
+        for user_id, username, first_name, last_name, dept_id, _dept_name, _unassigned in employees:
+            cells = []
+            for index, day in enumerate(week_days):
+                record = records.get((user_id, day))
+                cells.append(WeekCell(day, record) if record else empty_cells[index])
+            name = f"{first_name} {last_name}".strip() or username
+            dept_map.get(dept_id, unassigned)["rows"].append(WeekRow(user_id, name, tuple(cells)))
+
+
+def build_week_matrix(
+    week_start: date, department_id=None, search=None, include_inactive: bool = False
+):
+    week_days = get_week_days(week_start)
+    dept_qs = Department.objects.all()
+    if not include_inactive:
+        dept_qs = dept_qs.filter(is_active=True)
+    dept_tables = []
+    dept_map = {}
+    for dept in dept_qs:
+        table = {"department": dept, "label": dept.name, "rows": []}
+        dept_tables.append(table)
+        dept_map[dept.id] = table
+
+    unassigned_table = {"department": None, "label": _("Unassigned"), "rows": []}
+    fill_week_tables(
+        iter_week_chunks(week_start, department_id, search, include_inactive),
+        week_days,
+        dept_map,
+        unassigned_table,
+    )
+    if unassigned_table["rows"]:
+        dept_tables.append(unassigned_table)
+
+    return week_days, dept_tables
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from datetime import date, timedelta
+
+from django.db import models, transaction
+
+from .models import CalendarDay, PublicHoliday
+from .utils import weekdays_between
+
+
+CALENDAR_START = date(2020, 1, 1)
+
+# Fixed-date public holidays in Cameroon. Easter-based holidays are derived
+# per year; Eid dates follow the lunar calendar and are added in the admin.
+CAMEROON_FIXED_HOLIDAYS = [
+    (1, 1, "New Year's Day"),
+    (2, 11, "Youth Day"),
+    (5, 1, "Labour Day"),
+    (5, 20, "National Day"),
+    (8, 15, "Assumption Day"),
+    (12, 25, "Christmas Day"),
+]
+
+_lock = threading.Lock()
+_cached: dict = {"calendar": None, "version": None}
+
+
+def easter_sunday(year: int) -> date:
+    # Anonymous Gregorian algorithm.
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def cameroon_holidays(year: int) -> list[tuple[date, str]]:
+    easter = easter_sunday(year)
+    holidays = [(date(year, month, day), name) for month, day, name in CAMEROON_FIXED_HOLIDAYS]
+    holidays.append((easter - timedelta(days=2), "Good Friday"))
+    holidays.append((easter + timedelta(days=39), "Ascension Day"))
+    return sorted(holidays)
+
+
+class WorkingCalendar:
+    """In-memory prefix counts of the materialized calendar.
+
+    ``cumulative[i]`` is the number of working days from ``first_day`` up to
+    and including ``first_day + i``, so any range inside the table costs two
+    list lookups. Dates outside the table fall back to a closed-form weekday
+    count minus the registered holidays.
+    """
+
+    def __init__(self, first_day: date | None, cumulative: list[int], holidays: list[date]):
+        self.first_day = first_day
+        self.cumulative = cumulative
+        self.holidays = holidays
+
+    @property
+    def last_day(self) -> date | None:
+        if self.first_day is None or not self.cumulative:
+            return None
+        return self.first_day + timedelta(days=len(self.cumulative) - 1)
+
+    def _prefix(self, day: date) -> int:
+        index = (day - self.first_day).days
+        return self.cumulative[index] if index >= 0 else 0
+
+    def _outside_table(self, start: date, end: date) -> int:
+        if start > end:
+            return 0
+        lo = bisect.bisect_left(self.holidays, start)
+        hi = bisect.bisect_right(self.holidays, end)
+        holidays = sum(1 for day in self.holidays[lo:hi] if day.weekday() < 5)
+        return weekdays_between(start, end) - holidays
+
+    def working_days_between(self, start: date, end: date) -> int:
+        if start > end:
+            return 0
+        first_day, last_day = self.first_day, self.last_day
+        if first_day is None:
+            return self._outside_table(start, end)
+        count = 0
+        if start < first_day:
+            count += self._outside_table(start, min(end, first_day - timedelta(days=1)))
+        if end > last_day:
+            count += self._outside_table(max(start, last_day + timedelta(days=1)), end)
+        lo, hi = max(start, first_day), min(end, last_day)
+        if lo <= hi:
+            count += self._prefix(hi) - self._prefix(lo - timedelta(days=1))
+        return count
+
+    def is_working_day(self, day: date) -> bool:
+        return self.working_days_between(day, day) == 1
+
+
+def load_calendar() -> WorkingCalendar:
+    rows = list(CalendarDay.objects.order_by("date").values_list("date", "working_day_number"))
+    holidays = list(PublicHoliday.objects.order_by("date").values_list("date", flat=True))
+    if not rows:
+        return WorkingCalendar(None, [], holidays)
+    first_day = rows[0][0]
+    # Rebuilding always writes a contiguous range, so position equals offset.
+    return WorkingCalendar(first_day, [number for _day, number in rows], holidays)
+
+
+def calendar_version() -> int | None:
+    """Changes with every rebuild, which replaces all rows; a primary key lookup."""
+    return CalendarDay.objects.aggregate(version=models.Max("id"))["version"]
+
+
+def get_calendar() -> WorkingCalendar:
+    """The cached calendar, reloaded once any process has rebuilt the table."""
+    version = calendar_version()
+    calendar = _cached["calendar"]
+    if calendar is None or _cached["version"] != version:
+        with _lock:
+            # Read before loading: a rebuild in between only costs one more reload.
+            calendar = load_calendar()
+            _cached["calendar"] = calendar
+            _cached["version"] = version
+    return calendar
+
+
+def invalidate_calendar() -> None:
+    _cached["calendar"] = None
+
+
+def working_days_between(start: date, end: date) -> int:
+    """Working days in ``[start, end]``, excluding weekends and public holidays."""
+    return get_calendar().working_days_between(start, end)
+
+
+def is_working_day(day: date) -> bool:
+    return get_calendar().is_working_day(day)
+
+
+def rebuild_calendar(start: date | None = None, end: date | None = None) -> int:
+    """Materialize the calendar table for ``[start, end]``.
+
+    Without bounds the current span is rebuilt, which is what a holiday
+    change needs.
+    """
+    if start is None or end is None:
+        bounds = CalendarDay.objects.order_by("date").values_list("date", flat=True)
+        start = start or bounds.first() or CALENDAR_START
+        end = end or bounds.last() or date(date.today().year + 1, 12, 31)
+    if start > end:
+        return 0
+
+    holidays = dict(
+        PublicHoliday.objects.filter(date__range=(start, end)).values_list("date", "id")
+    )
+    rows = []
+    number = 0
+    day = start
+    while day <= end:
+        holiday_id = holidays.get(day)
+        is_working = day.weekday() < 5 and holiday_id is None
+        number += 1 if is_working else 0
+        rows.append(
+            CalendarDay(
+                date=day,
+                is_working_day=is_working,
+                holiday_id=holiday_id,
+                working_day_number=number,
+            )
+        )
+        day += timedelta(days=1)
+
+    with transaction.atomic():
+        CalendarDay.objects.all().delete()
+        CalendarDay.objects.bulk_create(rows, batch_size=1000)
+    transaction.on_commit(invalidate_calendar)
+    return len(rows)
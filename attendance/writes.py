@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import date, time
+from typing import NamedTuple
+
+from django.db import connection
+from django.utils import timezone
+
+from .dbretry import retry_write
+from .models import AttendanceDay, User, _attendance_changed
+
+
+class DayWrite(NamedTuple):
+    created: bool
+    changed: tuple[str, ...]
+    arrival: time | None
+    departure: time | None
+
+
+def _insert_day(user_id: int, day: date, arrival, departure, now, active_only: bool = False) -> bool:
+    """Insert the day unless it exists, in one statement; true when inserted.
+
+    With ``active_only`` the row is only inserted for an active user whose
+    start date has come.
+    """
+    table = connection.ops.quote_name(AttendanceDay._meta.db_table)
+    now_value = connection.ops.adapt_datetimefield_value(now)
+    day_value = connection.ops.adapt_datefield_value(day)
+    values = [
+        day_value,
+        connection.ops.adapt_timefield_value(arrival),
+        connection.ops.adapt_timefield_value(departure),
+        now_value,
+        now_value,
+    ]
+    columns = "(user_id, date, arrival_time, departure_time, created_at, updated_at)"
+    with connection.cursor() as cursor:
+        if active_only:
+            users = connection.ops.quote_name(User._meta.db_table)
+            cursor.execute(
+                f"INSERT INTO {table} {columns} "
+                f"SELECT id, %s, %s, %s, %s, %s FROM {users} "
+                "WHERE id = %s AND is_active = %s AND start_date <= %s "
+                "ON CONFLICT (user_id, date) DO NOTHING",
+                [*values, user_id, True, day_value],
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {table} {columns} "
+                "VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (user_id, date) DO NOTHING",
+                [user_id, *values],
+            )
+        return cursor.rowcount == 1
+
+
+@retry_write
+def write_day(
+    user_id: int,
+    day: date,
+    arrival: time | None = None,
+    departure: time | None = None,
+    *,
+    overwrite: bool = False,
+    departure_needs_arrival: bool = True,
+    active_only: bool = False,
+) -> DayWrite:
+    """Record ``arrival`` and/or ``departure`` for one day without a read-modify-write.
+
+    ``None`` leaves a field alone. Without ``overwrite`` a field is only set
+    while it is empty; with it (supervisor edits) a different value replaces
+    the stored one. A departure needs an arrival unless
+    ``departure_needs_arrival`` is false. Every condition is part of the
+    INSERT or UPDATE itself, so concurrent submissions cannot raise on
+    ``unique_attendance_day`` or overwrite each other. A first write of the
+    day is a single INSERT. With ``active_only`` (badge readers, which only
+    hold a signed user id) nothing is written or returned for an inactive
+    user or before their start date.
+    """
+    now = timezone.now()
+    days = AttendanceDay.objects.filter(user_id=user_id, date=day)
+    if active_only:
+        days = days.filter(user__is_active=True, user__start_date__lte=day)
+    # A departure alone never creates the day when it needs an arrival.
+    insert_departure = None if departure_needs_arrival and arrival is None else departure
+    if (arrival is not None or insert_departure is not None) and _insert_day(
+        user_id, day, arrival, insert_departure, now, active_only
+    ):
+        _attendance_changed([(user_id, day)])
+        changed = tuple(
+            field
+            for field, value in (("arrival_time", arrival), ("departure_time", insert_departure))
+            if value is not None
+        )
+        return DayWrite(True, changed, arrival, insert_departure)
+
+    changed = []
+    for field, value in (("arrival_time", arrival), ("departure_time", departure)):
+        if value is None:
+            continue
+        target = days
+        if field == "departure_time" and departure_needs_arrival:
+            target = target.filter(arrival_time__isnull=False)
+        if overwrite:
+            target = target.exclude(**{field: value})
+        else:
+            target = target.filter(**{f"{field}__isnull": True})
+        if target.update_unhooked(**{field: value, "updated_at": now}):
+            changed.append(field)
+
+    if changed:
+        _attendance_changed([(user_id, day)])
+    current = days.values_list("arrival_time", "departure_time").first() or (None, None)
+    return DayWrite(False, tuple(changed), *current)
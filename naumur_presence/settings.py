@@ -61,6 +61,48 @@ DATABASES = {
     }
 }
 
+# Opt-in SQLite profile for production (DJANGO_SQLITE_PROFILE=production): WAL lets
+# readers run alongside the single writer, IMMEDIATE transactions take the write
+# lock up front so busy_timeout can queue writers instead of failing them.
+SQLITE_PRODUCTION_OPTIONS = {
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA mmap_size=134217728;"
+        "PRAGMA cache_size=-20000;"
+        "PRAGMA busy_timeout=5000;"
+    ),
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 5,
+}
+if os.environ.get("DJANGO_SQLITE_PROFILE") == "production":
+    DATABASES["default"]["OPTIONS"] = SQLITE_PRODUCTION_OPTIONS
+
+# Retries of write transactions that hit "database is locked" (see attendance.dbretry).
+DATABASE_WRITE_RETRIES = int(os.environ.get("DJANGO_DB_WRITE_RETRIES", 3))
+DATABASE_RETRY_BACKOFF = float(os.environ.get("DJANGO_DB_RETRY_BACKOFF", 0.05))
+
+# Seconds between a committed attendance change and the refresh of its rollups
+# (see attendance.rollups.RollupRefresher); changes in between share one refresh.
+ROLLUP_REFRESH_SECONDS = float(os.environ.get("DJANGO_ROLLUP_REFRESH_SECONDS", 2.0))
+
+# SystemLog/UserActivity writes (see attendance.audit): "sync" inserts each row
+# in the request, "buffered" queues rows per process and writes them in batches.
+AUDIT_LOG_MODE = os.environ.get("DJANGO_AUDIT_LOG_MODE", "sync")
+AUDIT_LOG_BATCH_SIZE = int(os.environ.get("DJANGO_AUDIT_LOG_BATCH_SIZE", 100))
+AUDIT_LOG_FLUSH_SECONDS = float(os.environ.get("DJANGO_AUDIT_LOG_FLUSH_SECONDS", 2.0))
+AUDIT_LOG_MAX_QUEUE = int(os.environ.get("DJANGO_AUDIT_LOG_MAX_QUEUE", 10000))
+
+# archive_logs moves older SystemLog/UserActivity rows to gzip JSONL files here.
+LOG_ARCHIVE_ROOT = Path(os.environ.get("DJANGO_LOG_ARCHIVE_ROOT", BASE_DIR / "archive"))
+LOG_RETENTION_DAYS = int(os.environ.get("DJANGO_LOG_RETENTION_DAYS", 90))
+
+# Presence (see attendance.presence): last-seen times are kept in memory and
+# written every PRESENCE_FLUSH_SECONDS; users count as online for
+# PRESENCE_ONLINE_SECONDS after their last request.
+PRESENCE_FLUSH_SECONDS = float(os.environ.get("DJANGO_PRESENCE_FLUSH_SECONDS", 60))
+PRESENCE_ONLINE_SECONDS = int(os.environ.get("DJANGO_PRESENCE_ONLINE_SECONDS", 300))
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -102,7 +144,9 @@ LOGOUT_REDIRECT_URL = "login"
 
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 SESSION_COOKIE_AGE = 60 * 60 * 24 * 365
-SESSION_SAVE_EVERY_REQUEST = True
+# ActivityMiddleware re-saves each session once a day, which keeps the expiry
+# rolling without a session write on every request.
+SESSION_SAVE_EVERY_REQUEST = False
 
 CACHES = {
     "default": {
@@ -112,3 +156,6 @@ CACHES = {
 }
 
 CSRF_TRUSTED_ORIGINS = os.environ.get("DJANGO_CSRF_TRUSTED_ORIGINS", "").split()
+
+# Lifetime of kiosk badge tokens; reissue them with `manage.py issue_kiosk_tokens`.
+KIOSK_TOKEN_MAX_AGE = int(os.environ.get("KIOSK_TOKEN_MAX_AGE", 60 * 60 * 24))
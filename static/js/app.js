@@ -96,32 +96,316 @@ document.addEventListener("keydown", (event) => {
   }
 });
 
-const justificationForm = document.querySelector("[data-justification-form]");
-if (justificationForm) {
-  const reasonSelect = justificationForm.querySelector("select[name='reason']");
-  const otherField = justificationForm.querySelector("[data-other-reason]");
-
-  const toggleOtherReason = () => {
-    if (!reasonSelect || !otherField) return;
-    const show = reasonSelect.value === "other";
-    otherField.style.display = show ? "block" : "none";
-  };
+function initJustificationForms(scope) {
+  scope.querySelectorAll("[data-justification-form]").forEach((form) => {
+    const reasonSelect = form.querySelector("select[name='reason']");
+    const otherField = form.querySelector("[data-other-reason]");
 
-  toggleOtherReason();
-  if (reasonSelect) {
-    reasonSelect.addEventListener("change", toggleOtherReason);
-  }
+    const toggleOtherReason = () => {
+      if (!reasonSelect || !otherField) return;
+      const show = reasonSelect.value === "other";
+      otherField.style.display = show ? "block" : "none";
+    };
+
+    toggleOtherReason();
+    if (reasonSelect) {
+      reasonSelect.addEventListener("change", toggleOtherReason);
+    }
+  });
 }
 
-document.querySelectorAll("[data-chart-download]").forEach((button) => {
-  button.addEventListener("click", () => {
-    const targetId = button.getAttribute("data-chart-target");
-    const filename = button.getAttribute("data-filename") || "chart.png";
-    const canvas = document.getElementById(targetId);
-    if (!canvas) return;
+initJustificationForms(document);
+
+document.addEventListener("click", (event) => {
+  const button = event.target.closest("[data-chart-download]");
+  if (!button) return;
+  const targetId = button.getAttribute("data-chart-target");
+  const filename = button.getAttribute("data-filename") || "chart.png";
+  const canvas = document.getElementById(targetId);
+  if (!canvas) return;
+  const link = document.createElement("a");
+  link.href = canvas.toDataURL("image/png", 1.0);
+  link.download = filename;
+  link.click();
+});
+
+function initTrendCharts(scope) {
+  if (!window.Chart) return;
+  scope.querySelectorAll("canvas[data-trend-chart]").forEach((canvas) => {
+    const source = document.getElementById(canvas.dataset.trendChart);
+    if (!source) return;
+    new Chart(canvas, {
+      type: "line",
+      data: JSON.parse(source.textContent),
+      options: {
+        responsive: true,
+        maintainAspectRatio: false,
+        plugins: { legend: { position: "bottom" } },
+        scales: { y: { beginAtZero: true, max: 100, ticks: { callback: (value) => `${value}%` } } },
+      },
+    });
+  });
+}
+
+function loadFragment(container) {
+  fetch(container.dataset.fragment, { credentials: "same-origin" })
+    .then((response) => {
+      if (!response.ok) throw new Error(response.statusText);
+      return response.text();
+    })
+    .then((html) => {
+      container.innerHTML = html;
+      initTrendCharts(container);
+      initJustificationForms(container);
+    })
+    .catch(() => {
+      container.innerHTML = "";
+    });
+}
+
+const fragments = document.querySelectorAll("[data-fragment]");
+if ("IntersectionObserver" in window) {
+  const fragmentObserver = new IntersectionObserver(
+    (entries) => {
+      entries.forEach((entry) => {
+        if (!entry.isIntersecting) return;
+        fragmentObserver.unobserve(entry.target);
+        loadFragment(entry.target);
+      });
+    },
+    { rootMargin: "200px" }
+  );
+  fragments.forEach((container) => fragmentObserver.observe(container));
+} else {
+  fragments.forEach(loadFragment);
+}
+
+const EXPORT_POLL_MS = 2000;
+
+function showExportJob(statusEl, job) {
+  statusEl.textContent = "";
+  if (job.download_url) {
     const link = document.createElement("a");
-    link.href = canvas.toDataURL("image/png", 1.0);
-    link.download = filename;
-    link.click();
+    link.href = job.download_url;
+    link.textContent = job.filename;
+    statusEl.appendChild(link);
+  } else {
+    statusEl.textContent = job.error || job.note || job.status_label;
+  }
+}
+
+function pollExportJob(statusEl, job) {
+  showExportJob(statusEl, job);
+  if (job.stalled || (job.status !== "pending" && job.status !== "running")) return;
+  window.setTimeout(() => {
+    fetch(job.status_url, { credentials: "same-origin" })
+      .then((response) => response.json())
+      .then((next) => pollExportJob(statusEl, next))
+      .catch(() => {
+        statusEl.textContent = "";
+      });
+  }, EXPORT_POLL_MS);
+}
+
+document.querySelectorAll("[data-export-job]").forEach((form) => {
+  const statusEl = form.querySelector("[data-export-status]");
+  form.addEventListener("submit", (event) => {
+    event.preventDefault();
+    fetch(form.action, {
+      method: "POST",
+      body: new FormData(form),
+      credentials: "same-origin",
+    })
+      .then((response) => response.json())
+      .then((job) => {
+        if (statusEl) pollExportJob(statusEl, job);
+      })
+      .catch(() => {
+        if (statusEl) statusEl.textContent = "";
+      });
   });
 });
+
+function applyPendingChange(tbody, change) {
+  const current = tbody.querySelector(`[data-pending-id="${change.id}"]`);
+  if (change.status === "pending") {
+    const template = document.createElement("template");
+    template.innerHTML = change.html.trim();
+    const row = template.content.firstElementChild;
+    if (current) {
+      const checkbox = current.querySelector("input[name='verify_ids']");
+      const nextCheckbox = row.querySelector("input[name='verify_ids']");
+      if (checkbox && nextCheckbox) nextCheckbox.checked = checkbox.checked;
+      current.replaceWith(row);
+    } else {
+      tbody.insertBefore(row, tbody.querySelector("[data-pending-empty]"));
+    }
+  } else if (current) {
+    current.remove();
+  }
+  const empty = tbody.querySelector("[data-pending-empty]");
+  if (empty) empty.hidden = Boolean(tbody.querySelector("[data-pending-id]"));
+}
+
+const pendingFeed = document.querySelector("[data-pending-feed]");
+if (pendingFeed && "EventSource" in window) {
+  const source = new EventSource(pendingFeed.dataset.pendingFeed);
+  source.addEventListener("attendance", (event) => {
+    applyPendingChange(pendingFeed, JSON.parse(event.data));
+  });
+}
+
+const SYNC_FLUSH_MS = 30000;
+const SYNC_BATCH_SIZE = 50;
+
+function syncQueueKey(userId) {
+  return `naumur-sync-queue-${userId}`;
+}
+
+function readSyncQueue(userId) {
+  try {
+    return JSON.parse(localStorage.getItem(syncQueueKey(userId))) || [];
+  } catch (error) {
+    return [];
+  }
+}
+
+function writeSyncQueue(userId, queue) {
+  localStorage.setItem(syncQueueKey(userId), JSON.stringify(queue));
+}
+
+function newSyncEventId() {
+  if (window.crypto && window.crypto.randomUUID) return window.crypto.randomUUID();
+  return `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+}
+
+function flushSyncQueue(form) {
+  const userId = form.dataset.syncUser;
+  const batch = readSyncQueue(userId).slice(0, SYNC_BATCH_SIZE);
+  if (!batch.length || form.dataset.syncing) return Promise.resolve(false);
+  form.dataset.syncing = "1";
+  const csrf = form.querySelector("input[name='csrfmiddlewaretoken']");
+  return fetch(form.dataset.offlineSync, {
+    method: "POST",
+    credentials: "same-origin",
+    headers: { "Content-Type": "application/json", "X-CSRFToken": csrf ? csrf.value : "" },
+    body: JSON.stringify({ events: batch }),
+  })
+    .then((response) => {
+      // Bad events are rejected one by one, so a refused batch is kept and flagged.
+      if (response.status === 400) form.dataset.syncRefused = "1";
+      if (!response.ok) throw new Error(response.statusText);
+      delete form.dataset.syncRefused;
+      return response.json();
+    })
+    .then((data) => {
+      // Results come back in request order, so events without a usable id still match.
+      const done = new Set(data.results.map((result, index) => batch[index].id));
+      writeSyncQueue(userId, readSyncQueue(userId).filter((event) => !done.has(event.id)));
+      return true;
+    })
+    .catch(() => false)
+    .finally(() => {
+      delete form.dataset.syncing;
+    });
+}
+
+const syncForm = document.querySelector("[data-offline-sync]");
+if (syncForm) {
+  const userId = syncForm.dataset.syncUser;
+  const syncStatus = syncForm.querySelector("[data-sync-status]");
+
+  const showSyncStatus = () => {
+    if (!syncStatus) return;
+    const count = readSyncQueue(userId).length;
+    const label = syncForm.dataset.syncRefused
+      ? syncStatus.dataset.refusedLabel
+      : syncStatus.dataset.pendingLabel;
+    syncStatus.hidden = !count;
+    syncStatus.textContent = count ? `${label} (${count})` : "";
+  };
+
+  const flushAndRefresh = () =>
+    flushSyncQueue(syncForm).then((flushed) => {
+      if (flushed) {
+        window.location.reload();
+      } else {
+        showSyncStatus();
+      }
+    });
+
+  syncForm.addEventListener("submit", (event) => {
+    const day = event.submitter ? event.submitter.value : "";
+    if (day !== syncForm.dataset.today) return;
+    const recordedAt = new Date().toISOString();
+    const queued = [];
+    ["arrive", "depart"].forEach((action) => {
+      const box = syncForm.querySelector(`input[name='${action}_${day}']`);
+      const timeInput = syncForm.querySelector(`input[name='${action}_time_${day}']`);
+      if (!box || !box.checked || box.disabled || !timeInput || !timeInput.value) return;
+      queued.push({
+        id: newSyncEventId(),
+        action,
+        date: day,
+        time: timeInput.value,
+        recorded_at: recordedAt,
+      });
+    });
+    if (!queued.length) return;
+    event.preventDefault();
+    writeSyncQueue(userId, readSyncQueue(userId).concat(queued));
+    flushAndRefresh();
+  });
+
+  showSyncStatus();
+  flushAndRefresh();
+  window.addEventListener("online", flushAndRefresh);
+  window.setInterval(flushAndRefresh, SYNC_FLUSH_MS);
+}
+
+const timelineList = document.querySelector("[data-timeline]");
+const timelineMore = document.querySelector("[data-timeline-more]");
+if (timelineList && timelineMore) {
+  let timelineLoading = false;
+
+  function loadTimelinePage() {
+    const next = timelineList.dataset.timelineNext;
+    if (!next || timelineLoading) return;
+    timelineLoading = true;
+    fetch(next, { credentials: "same-origin", headers: { Accept: "application/json" } })
+      .then((response) => {
+        if (!response.ok) throw new Error(response.statusText);
+        return response.json();
+      })
+      .then((page) => {
+        timelineList.insertAdjacentHTML("beforeend", page.html);
+        if (page.next) {
+          timelineList.dataset.timelineNext = page.next;
+        } else {
+          delete timelineList.dataset.timelineNext;
+          timelineMore.remove();
+        }
+      })
+      .catch(() => {
+        timelineMore.remove();
+      })
+      .finally(() => {
+        timelineLoading = false;
+        // The observer only fires on changes; keep filling while the end is still visible.
+        if (timelineMore.isConnected && timelineMore.getBoundingClientRect().top < window.innerHeight + 400) {
+          loadTimelinePage();
+        }
+      });
+  }
+
+  if ("IntersectionObserver" in window) {
+    new IntersectionObserver(
+      (entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) loadTimelinePage();
+      },
+      { rootMargin: "400px" }
+    ).observe(timelineMore);
+  } else {
+    timelineMore.remove();
+  }
+}